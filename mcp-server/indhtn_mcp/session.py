@@ -559,8 +559,15 @@ class HtnSession:
         # ``AddRule`` precondition assert.
         added: list[str] = []
         errors: list[dict] = []
-        for fact in facts:
-            fact_clean = _strip_trailing_period(fact)
+        checked = [(fact, _strip_trailing_period(fact)) for fact in facts]
+        # All the asserts go to the engine in one PrologQueryBatch call,
+        # which runs them in order exactly like one PrologQuery each.
+        results = iter(self.planner.PrologQueryBatch([
+            f"assert({fact_clean})."
+            for _, fact_clean in checked
+            if "?" not in fact_clean
+        ]))
+        for fact, fact_clean in checked:
             if "?" in fact_clean:
                 errors.append({
                     "fact": fact,
@@ -570,7 +577,7 @@ class HtnSession:
                     ),
                 })
                 continue
-            error, _raw = self.planner.PrologQuery(f"assert({fact_clean}).")
+            error, _raw = next(results)
             if error is not None:
                 errors.append({"fact": fact, "error": _sanitize_engine_error(error)})
             else:
@@ -599,6 +606,8 @@ class HtnSession:
             return {"removed": [], "notPresent": missing}
 
         removed: list[str] = []
+        # One query per fact rather than a PrologQueryBatch: a failed
+        # retract must stop here so the facts after it are left in place.
         for fact in to_remove:
             error, _raw = self.planner.PrologQuery(f"retract({fact}).")
             if error is not None:
@@ -1,6 +1,7 @@
 #include <memory>
 #include <new> //For std::nothrow
 #include <stdio.h>
+#include <string.h>
 #include <iostream>
 #include <algorithm>
 #include <sstream>
@@ -159,6 +160,12 @@ extern "C"  //Tells the compile to use C-linkage for the next scope.
         free(value);
     }
 
+    // Lets Python wrap a returned string in place instead of copying it out first
+    __declspec(dllexport) uint64_t __stdcall StringLength(const char* value)
+    {
+        return strlen(value);
+    }
+
     char* GetCharPtrFromString(const string& value)
     {
         return _strdup(value.c_str());
@@ -687,6 +694,56 @@ extern "C"  //Tells the compile to use C-linkage for the next scope.
         }
     }
 
+    // Helper function to copy the facts in an HtnRuleSet into a malloc'd array of strings
+    // so Python can read them without parsing JSON. Free with FreeStringArray()
+    char** RuleSetFactsToArray(std::shared_ptr<HtnRuleSet> ruleSet, uint64_t *count)
+    {
+        std::vector<std::string> facts;
+        ruleSet->AllRules([&](const HtnRule& rule) {
+            if(rule.IsFact())
+            {
+                facts.push_back(rule.head()->ToString());
+            }
+            return true; // continue iterating
+        });
+
+        char** values = (char**) malloc(std::max<size_t>(facts.size(), 1) * sizeof(char*));
+        for(size_t index = 0; index < facts.size(); ++index)
+        {
+            values[index] = GetCharPtrFromString(facts[index]);
+        }
+
+        *count = facts.size();
+        return values;
+    }
+
+    __declspec(dllexport) void __stdcall FreeStringArray(char** values, uint64_t count)
+    {
+        for(uint64_t index = 0; index < count; ++index)
+        {
+            free(values[index]);
+        }
+
+        free(values);
+    }
+
+    // Same as HtnGetStateFacts() but *result is an array of *count fact strings instead of JSON
+    __declspec(dllexport) char* __stdcall HtnGetStateFactsArray(HtnPlannerPythonWrapper* ptr, char ***result, uint64_t *count)
+    {
+        TreatFailFastAsException(true);
+        try
+        {
+            *result = RuleSetFactsToArray(ptr->m_state, count);
+            return nullptr;
+        }
+        catch(runtime_error &error)
+        {
+            *result = nullptr;
+            *count = 0;
+            return GetCharPtrFromString(error.what());
+        }
+    }
+
     // Helper: render a goals vector as a JSON array of Prolog-ish goal strings
     std::string GoalsToJsonArray(const std::vector<std::shared_ptr<HtnTerm>> &goals)
     {
@@ -771,6 +828,31 @@ extern "C"  //Tells the compile to use C-linkage for the next scope.
         }
     }
 
+    // Same as HtnGetSolutionFacts() but *result is an array of *count fact strings instead of JSON
+    __declspec(dllexport) char* __stdcall HtnGetSolutionFactsArray(HtnPlannerPythonWrapper* ptr, const uint64_t solutionIndex, char ***result, uint64_t *count)
+    {
+        TreatFailFastAsException(true);
+        try
+        {
+            if(ptr->m_lastSolutions == nullptr || solutionIndex >= ptr->m_lastSolutions->size())
+            {
+                *result = nullptr;
+                *count = 0;
+                return GetCharPtrFromString("Invalid solution index or no solutions available");
+            }
+
+            auto solution = (*ptr->m_lastSolutions)[solutionIndex];
+            *result = RuleSetFactsToArray(solution->finalState(), count);
+            return nullptr;
+        }
+        catch(runtime_error &error)
+        {
+            *result = nullptr;
+            *count = 0;
+            return GetCharPtrFromString(error.what());
+        }
+    }
+
     // Returns the parallelized plan for a specific solution as JSON
     // Analyzes parallel scopes (marked by beginParallel/endParallel) and assigns timesteps
     // for parallel execution. Tasks within parallel scopes get the same timestep (can run concurrently).
@@ -1078,6 +1160,39 @@ extern "C"  //Tells the compile to use C-linkage for the next scope.
         }
     }
 
+    // Runs count queries with a single call so callers issuing many small queries only cross
+    // the FFI boundary once. queries holds each query as a 4 byte little endian length followed by
+    // that many bytes of UTF-8 query text, back to back.
+    // On success returns nullptr and *result holds one entry per query, in order, each encoded as
+    //      <kind><length>:<payload>
+    // where kind is 'r' (payload is the Json PrologQuery would put in *result) or 'e' (payload is
+    // the error PrologQuery would return) and length is the payload byte length in decimal.
+    __declspec(dllexport) char* __stdcall PrologQueryBatch(HtnPlannerPythonWrapper* ptr, const char* queries, int count, char** result)
+    {
+        string packed;
+        const unsigned char* next = (const unsigned char*) queries;
+        for(int index = 0; index < count; ++index)
+        {
+            uint32_t queryLength = (uint32_t) next[0] | ((uint32_t) next[1] << 8) | ((uint32_t) next[2] << 16) | ((uint32_t) next[3] << 24);
+            next += 4;
+
+            // PrologQuery needs a null terminated string
+            string queryString((const char*) next, queryLength);
+            next += queryLength;
+
+            char* queryResult = nullptr;
+            char* errorMessage = ::PrologQuery(ptr, &queryString[0], &queryResult);
+            char* payload = errorMessage != nullptr ? errorMessage : queryResult;
+            string payloadString = payload != nullptr ? string(payload) : string();
+            packed += (errorMessage != nullptr ? 'e' : 'r') + lexical_cast<string>(payloadString.size()) + ":" + payloadString;
+            free(errorMessage);
+            free(queryResult);
+        }
+
+        *result = GetCharPtrFromString(packed);
+        return nullptr;
+    }
+
     // returns result in Json format
     // if the query failed, it will be a False term
     __declspec(dllexport) char* __stdcall PrologSolveGoals(HtnPlannerPythonWrapper* ptr, char** result)
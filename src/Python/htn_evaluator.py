@@ -16,7 +16,6 @@ The by-atom / by-method views are built by `_build_by_atom_view` /
 `_build_by_method_view`.
 """
 
-import json
 import logging
 import math
 import os
@@ -30,7 +29,7 @@ _log = logging.getLogger(__name__)
 # regardless of where the caller imports from.
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from indhtnpy import HtnPlanner
+from indhtnpy import HtnPlanner, _json_loads, resultIsFailure
 
 
 def _find_project_root() -> str:
@@ -45,23 +44,27 @@ def _find_project_root() -> str:
 
 
 def _extract_operator_name(op_dict: dict) -> str:
-    """Return the functor name of a single operator dict, e.g. 'opMoveTo'."""
-    return list(op_dict.keys())[0]
+    """Return the functor name of a single operator dict, e.g. 'opMoveTo'.
+
+    Names are interned: the same few operators repeat across every solution,
+    so the set/group comparisons below become identity checks.
+    """
+    return sys.intern(next(iter(op_dict)))
 
 
-def _parse_solutions(solutions_json: str) -> Optional[list]:
+def _parse_solutions(solutions_json: bytes) -> Optional[list]:
     """
-    Parse the JSON string from FindAllPlansCustomVariables.
+    Parse the JSON bytes from FindAllPlansCustomVariablesRaw.
 
     Returns a list of solutions (each is a list of operator dicts), or None
     if planning failed (i.e. the JSON represents a failure term list).
     """
-    data = json.loads(solutions_json)
-    if not data:
+    # A failure result starts with a dict with "false" as its only key. Check
+    # the text so the failure context doesn't get parsed just to be dropped.
+    if resultIsFailure(solutions_json):
         return None
-    # A failure result has a dict with "false" as its only key.
-    first = data[0]
-    if isinstance(first, dict) and "false" in first:
+    data = _json_loads(solutions_json)
+    if not data:
         return None
     return data
 
@@ -226,7 +229,7 @@ def evaluate_level(planner: HtnPlanner, goal: str) -> dict:
     if not goal_str.endswith("."):
         goal_str += "."
 
-    error, solutions_json = planner.FindAllPlansCustomVariables(goal_str)
+    error, solutions_json = planner.FindAllPlansCustomVariablesRaw(goal_str)
 
     if error is not None:
         # Planning returned a compile/runtime error — treat as unsolvable
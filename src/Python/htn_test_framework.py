@@ -5,15 +5,40 @@ This framework provides assertion methods for testing HTN planning behavior,
 query results, state changes, and decomposition trees.
 """
 
-import json
+import functools
 import os
 import sys
+from itertools import repeat
 from typing import List, Dict, Callable, Optional, Any, Tuple
 
 # Add the current directory to path for imports
 sys.path.insert(0, os.path.dirname(__file__))
 
-from indhtnpy import HtnPlanner, findAllPlansResultToPrologStringList, termToString, termName, termArgs
+from indhtnpy import HtnPlanner, _json_loads, findAllPlansJsonToPrologStringList, termToString, termName, termArgs
+
+
+@functools.lru_cache(maxsize=1)
+def _find_project_root_cached(start: str) -> str:
+    """Walk up from `start` to the first directory containing Examples/.
+
+    The answer never changes for the life of the process, so it is cached.
+    """
+    current = start
+    while current != os.path.dirname(current):  # Not at filesystem root
+        try:
+            with os.scandir(current) as entries:
+                if any(e.name == "Examples" and e.is_dir() for e in entries):
+                    return current
+        except OSError:
+            pass
+        current = os.path.dirname(current)
+    # Fallback to parent of src/Python
+    return os.path.abspath(os.path.join(start, "../.."))
+
+
+def _any_contains(strings: List[str], pattern: str) -> bool:
+    """True if `pattern` is a substring of any of `strings`."""
+    return any(pattern in s for s in strings)
 
 
 class TestResult:
@@ -25,10 +50,15 @@ class TestResult:
         self.details = details
 
     def __str__(self):
-        status = "PASS" if self.passed else "FAIL"
-        result = f"[{status}] {self.message}"
-        if not self.passed and self.details:
-            result += f"\n       Details: {self.details}"
+        return self.format(self.passed, self.message, self.details)
+
+    @staticmethod
+    def format(passed: bool, message: str, details: str = "") -> str:
+        """Format a result line without needing a TestResult instance."""
+        status = "PASS" if passed else "FAIL"
+        result = f"[{status}] {message}"
+        if not passed and details:
+            result += f"\n       Details: {details}"
         return result
 
 
@@ -51,7 +81,11 @@ class HtnTestSuite:
             verbose: Enable debug tracing
         """
         self.verbose = verbose
-        self.results: List[TestResult] = []
+        # Results are stored column-wise (one list per field) rather than as
+        # a list of TestResult objects; see the `results` property.
+        self._passed: List[bool] = []
+        self._messages: List[str] = []
+        self._details: List[str] = []
         self.htn_file = htn_file
         self._planner = None
         self._project_root = self._find_project_root()
@@ -61,13 +95,7 @@ class HtnTestSuite:
 
     def _find_project_root(self) -> str:
         """Find the project root directory (contains Examples/)."""
-        current = os.path.dirname(os.path.abspath(__file__))
-        while current != os.path.dirname(current):  # Not at filesystem root
-            if os.path.exists(os.path.join(current, "Examples")):
-                return current
-            current = os.path.dirname(current)
-        # Fallback to parent of src/Python
-        return os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+        return _find_project_root_cached(os.path.dirname(os.path.abspath(__file__)))
 
     def _resolve_path(self, path: str) -> str:
         """Resolve a path relative to project root."""
@@ -111,7 +139,9 @@ class HtnTestSuite:
 
     def _record(self, passed: bool, message: str, details: str = "") -> bool:
         """Record a test result and return whether it passed."""
-        self.results.append(TestResult(passed, message, details))
+        self._passed.append(passed)
+        self._messages.append(message)
+        self._details.append(details)
         return passed
 
     def _ensure_planner(self) -> bool:
@@ -279,11 +309,11 @@ class HtnTestSuite:
         if not self._ensure_planner():
             return []
 
-        error, facts_json = self._planner.GetStateFacts()
+        error, facts = self._planner.GetStateFactsList()
         if error is not None:
             return []
 
-        return json.loads(facts_json)
+        return facts
 
     def query_all(self, query: str) -> List[Dict[str, str]]:
         """
@@ -311,7 +341,7 @@ class HtnTestSuite:
         if error is not None:
             return []
 
-        solutions = json.loads(result)
+        solutions = _json_loads(result)
 
         # Check for failure
         if solutions and isinstance(solutions[0], dict) and "false" in solutions[0]:
@@ -357,7 +387,7 @@ class HtnTestSuite:
         if error is not None:
             return False
 
-        solutions = json.loads(result)
+        solutions = _json_loads(result)
         if not solutions or (isinstance(solutions[0], dict) and "false" in solutions[0]):
             return False
 
@@ -459,7 +489,7 @@ class HtnTestSuite:
         if error is not None:
             return self._record(False, message, f"Planning error: {error}")
 
-        solutions = json.loads(result)
+        solutions = _json_loads(result)
 
         # Check for failure result
         if solutions and isinstance(solutions[0], dict) and "false" in solutions[0]:
@@ -479,13 +509,12 @@ class HtnTestSuite:
                 f"Expected at most {max_solutions} solutions, got {num_solutions}")
 
         # Convert solutions to string representation for checking
-        solution_strs = findAllPlansResultToPrologStringList(result)
-        all_solutions_str = " ".join(solution_strs)
+        solution_strs = findAllPlansJsonToPrologStringList(solutions)
 
         # Check contains
         if contains:
             for pattern in contains:
-                if pattern not in all_solutions_str:
+                if not _any_contains(solution_strs, pattern):
                     return self._record(False, message,
                         f"Expected '{pattern}' in solutions but not found.\n"
                         f"       Solutions: {solution_strs[:3]}...")
@@ -493,7 +522,7 @@ class HtnTestSuite:
         # Check not_contains
         if not_contains:
             for pattern in not_contains:
-                if pattern in all_solutions_str:
+                if _any_contains(solution_strs, pattern):
                     return self._record(False, message,
                         f"Did not expect '{pattern}' in solutions but found it.\n"
                         f"       Solutions: {solution_strs[:3]}...")
@@ -541,14 +570,13 @@ class HtnTestSuite:
         if error is not None:
             return self._record(False, message, f"Planning error: {error}")
 
-        solutions = json.loads(result)
+        solutions = _json_loads(result)
 
         if solutions and isinstance(solutions[0], dict) and "false" in solutions[0]:
             return self._record(False, message, "Planning failed - no solutions found")
 
         # Convert solutions to string for checking
-        solution_strs = findAllPlansResultToPrologStringList(result)
-        all_solutions_str = " ".join(solution_strs)
+        solution_strs = findAllPlansJsonToPrologStringList(solutions)
 
         # Check each alternative
         for i, alt in enumerate(alternatives):
@@ -559,13 +587,13 @@ class HtnTestSuite:
             matches = True
 
             for pattern in contains:
-                if pattern not in all_solutions_str:
+                if not _any_contains(solution_strs, pattern):
                     matches = False
                     break
 
             if matches:
                 for pattern in not_contains:
-                    if pattern in all_solutions_str:
+                    if _any_contains(solution_strs, pattern):
                         matches = False
                         break
 
@@ -607,7 +635,7 @@ class HtnTestSuite:
         if error is not None:
             return self._record(False, message, f"Planning error: {error}")
 
-        solutions = json.loads(result)
+        solutions = _json_loads(result)
 
         if solutions and isinstance(solutions[0], dict) and "false" in solutions[0]:
             return self._record(False, message, "Planning failed - no solutions found")
@@ -659,7 +687,7 @@ class HtnTestSuite:
         if error is not None:
             return self._record(False, message, f"Query error: {error}")
 
-        solutions = json.loads(result)
+        solutions = _json_loads(result)
 
         # Check for failure
         if solutions and isinstance(solutions[0], dict) and "false" in solutions[0]:
@@ -745,17 +773,16 @@ class HtnTestSuite:
         if error is not None:
             return self._record(False, message, f"Planning error: {error}")
 
-        solutions = json.loads(result)
+        solutions = _json_loads(result)
         if not solutions or (isinstance(solutions[0], dict) and "false" in solutions[0]):
             return self._record(False, message, "No plan found to apply")
 
         # Get facts for the solution's final state
-        error, facts_json = self._planner.GetSolutionFacts(solution_index)
+        error, facts = self._planner.GetSolutionFactsList(solution_index)
 
         if error is not None:
             return self._record(False, message, f"Error getting solution facts: {error}")
 
-        facts = json.loads(facts_json)
         facts_str = " ".join(facts)
 
         # Check has
@@ -788,14 +815,12 @@ class HtnTestSuite:
         if not self._ensure_planner():
             return False
 
-        error, facts_json = self._planner.GetStateFacts()
+        error, facts = self._planner.GetStateFactsList()
 
         if error is not None:
             return self._record(False, f"Invariant: {description}",
                 f"Error getting facts: {error}")
 
-        facts = json.loads(facts_json)
-
         try:
             if check_fn(facts):
                 return self._record(True, f"Invariant: {description}")
@@ -842,7 +867,7 @@ class HtnTestSuite:
         if error is not None:
             return self._record(False, message, f"Planning error: {error}")
 
-        solutions = json.loads(result)
+        solutions = _json_loads(result)
         if not solutions or (isinstance(solutions[0], dict) and "false" in solutions[0]):
             return self._record(False, message, "No plan found")
 
@@ -852,7 +877,7 @@ class HtnTestSuite:
         if error is not None:
             return self._record(False, message, f"Error getting tree: {error}")
 
-        tree_nodes = json.loads(tree_json)
+        tree_nodes = _json_loads(tree_json)
 
         # Extract method and operator names from tree
         methods_used = set()
@@ -949,7 +974,7 @@ class HtnTestSuite:
         if error is not None:
             return self._record(False, message, f"Planning error: {error}")
 
-        solutions = json.loads(result)
+        solutions = _json_loads(result)
         if not solutions or (isinstance(solutions[0], dict) and "false" in solutions[0]):
             return self._record(False, message, "No plan found")
 
@@ -962,10 +987,10 @@ class HtnTestSuite:
         states = []
 
         # Step 0: initial state
-        error, facts_json = self._planner.GetStateFacts()
+        error, facts = self._planner.GetStateFactsList()
         if error:
             return self._record(False, message, f"Error getting initial state: {error}")
-        states.append(json.loads(facts_json))
+        states.append(facts)
 
         # For each step, we need to apply operators incrementally
         # Since the planner doesn't support partial application,
@@ -973,10 +998,9 @@ class HtnTestSuite:
         # We'll need to reconstruct intermediate states from the plan
 
         # Get final state
-        error, final_json = self._planner.GetSolutionFacts(0)
+        error, final_state = self._planner.GetSolutionFactsList(0)
         if error:
             return self._record(False, message, f"Error getting final state: {error}")
-        final_state = json.loads(final_json)
 
         # Check each assertion
         for assertion in step_assertions:
@@ -1053,7 +1077,7 @@ class HtnTestSuite:
         if error is not None:
             return self._record(False, message, f"Planning error: {error}")
 
-        solutions = json.loads(result)
+        solutions = _json_loads(result)
         if not solutions or (isinstance(solutions[0], dict) and "false" in solutions[0]):
             return self._record(False, message, "No plan found")
 
@@ -1125,9 +1149,9 @@ class HtnTestSuite:
 
         # Get current state
         try:
-            error, facts_json = self._planner.GetStateFacts()
+            error, facts = self._planner.GetStateFactsList()
             if not error:
-                context['current_state'] = json.loads(facts_json)
+                context['current_state'] = facts
         except Exception:
             pass
 
@@ -1136,14 +1160,14 @@ class HtnTestSuite:
             try:
                 error, result = self._planner.FindAllPlansCustomVariables(self._last_goal)
                 if not error:
-                    solutions = json.loads(result)
+                    solutions = _json_loads(result)
                     if solutions and not (isinstance(solutions[0], dict) and "false" in solutions[0]):
                         context['last_plan'] = solutions[0]
 
                         # Get decomposition tree
                         error, tree_json = self._planner.GetDecompositionTree(0)
                         if not error:
-                            context['decomposition_tree'] = json.loads(tree_json)
+                            context['decomposition_tree'] = _json_loads(tree_json)
             except Exception:
                 pass
 
@@ -1180,11 +1204,11 @@ class HtnTestSuite:
             return timeline
 
         # Get initial state
-        error, facts_json = self._planner.GetStateFacts()
+        error, facts = self._planner.GetStateFactsList()
         if error:
             return timeline
 
-        initial_state = set(json.loads(facts_json))
+        initial_state = set(facts)
         timeline.append({
             'step': 0,
             'operator': None,
@@ -1198,7 +1222,7 @@ class HtnTestSuite:
         if error:
             return timeline
 
-        solutions = json.loads(result)
+        solutions = _json_loads(result)
         if not solutions or (isinstance(solutions[0], dict) and "false" in solutions[0]):
             return timeline
 
@@ -1206,11 +1230,11 @@ class HtnTestSuite:
         operators = solutions[0] if isinstance(solutions[0], list) else []
 
         # Get final state
-        error, final_json = self._planner.GetSolutionFacts(0)
+        error, final_facts = self._planner.GetSolutionFactsList(0)
         if error:
             return timeline
 
-        final_state = set(json.loads(final_json))
+        final_state = set(final_facts)
 
         # For now, we can only compute initial and final
         # TODO: Implement incremental state reconstruction
@@ -1262,17 +1286,23 @@ class HtnTestSuite:
     # Reporting
     # =========================================================================
 
+    @property
+    def results(self) -> List[TestResult]:
+        """Recorded results as TestResult objects (built on demand)."""
+        return [TestResult(p, m, d)
+                for p, m, d in zip(self._passed, self._messages, self._details)]
+
     @property
     def tests_run(self) -> int:
-        return len(self.results)
+        return len(self._passed)
 
     @property
     def tests_passed(self) -> int:
-        return sum(1 for r in self.results if r.passed)
+        return sum(self._passed)
 
     @property
     def tests_failed(self) -> int:
-        return sum(1 for r in self.results if not r.passed)
+        return self.tests_run - self.tests_passed
 
     def summary(self) -> str:
         """Return a summary of test results."""
@@ -1282,8 +1312,8 @@ class HtnTestSuite:
             lines.append(f"Test Suite: {self.htn_file}")
         lines.append("=" * 50)
 
-        for result in self.results:
-            lines.append(str(result))
+        for passed, message, details in zip(self._passed, self._messages, self._details):
+            lines.append(TestResult.format(passed, message, details))
 
         lines.append("=" * 50)
         lines.append(f"Total: {self.tests_passed}/{self.tests_run} passed")
@@ -1306,11 +1336,11 @@ class HtnTestSuite:
             "tests_failed": self.tests_failed,
             "results": [
                 {
-                    "passed": r.passed,
-                    "message": r.message,
-                    "details": r.details
+                    "passed": passed,
+                    "message": message,
+                    "details": details
                 }
-                for r in self.results
+                for passed, message, details in zip(self._passed, self._messages, self._details)
             ]
         }
 
@@ -1339,4 +1369,5 @@ def no_duplicate_positions(facts: List[str], predicate: str = "at") -> bool:
 
 def fact_count(facts: List[str], pattern: str) -> int:
     """Count facts matching a pattern prefix."""
-    return sum(1 for f in facts if f.startswith(pattern))
+    # map(str.startswith, ...) keeps the whole loop in C; bools sum as ints
+    return sum(map(str.startswith, facts, repeat(pattern)))
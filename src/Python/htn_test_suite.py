@@ -10,14 +10,14 @@ Usage:
     python htn_test_suite.py --list             # List available test files
 """
 
+# unittest, json, io, contextlib, importlib.util and concurrent.futures are imported
+# where they are used so that e.g. --list does not pay for them.
 import argparse
-import io
-import json
+import functools
 import os
 import sys
-import unittest
-import importlib.util
-from typing import List, Dict, Any, Optional
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 # Add current directory to path
 sys.path.insert(0, os.path.dirname(__file__))
@@ -41,30 +41,75 @@ class TestResult:
 
 def discover_test_files(tests_dir: str) -> List[str]:
     """Find all test_*.py files in the tests directory."""
-    if not os.path.exists(tests_dir):
+    try:
+        mtime_ns = os.stat(tests_dir).st_mtime_ns
+    except FileNotFoundError:
         return []
 
-    test_files = []
-    for filename in os.listdir(tests_dir):
-        if filename.startswith("test_") and filename.endswith(".py"):
-            test_files.append(filename[:-3])  # Remove .py extension
+    # Keyed on the directory mtime so adding/removing a file invalidates it
+    return list(_discover_cached(tests_dir, mtime_ns))
 
-    return sorted(test_files)
+
+@functools.lru_cache(maxsize=32)
+def _discover_cached(tests_dir: str, mtime_ns: int) -> tuple:
+    with os.scandir(tests_dir) as entries:
+        # Strip the .py extension
+        return tuple(sorted(e.name[:-3] for e in entries
+                            if e.name.endswith(".py") and e.name.startswith("test_")))
+
+
+# Module specs by file path, so repeated loads in one process skip the
+# spec lookup.
+_SPEC_CACHE: Dict[str, Any] = {}
 
 
 def load_test_module(tests_dir: str, module_name: str):
-    """Dynamically load a test module."""
+    """Dynamically load a test module (reusing it if already imported)."""
+    import importlib.util
+
     module_path = os.path.join(tests_dir, f"{module_name}.py")
-    spec = importlib.util.spec_from_file_location(module_name, module_path)
+
+    module = sys.modules.get(module_name)
+    if module is not None and getattr(module, "__file__", None) == module_path:
+        return module
+
+    spec = _SPEC_CACHE.get(module_path)
+    if spec is None:
+        spec = importlib.util.spec_from_file_location(module_name, module_path)
+        _SPEC_CACHE[module_path] = spec
     module = importlib.util.module_from_spec(spec)
     sys.modules[module_name] = module
-    spec.loader.exec_module(module)
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        # Don't leave a half-initialised module behind for the fast path above
+        sys.modules.pop(module_name, None)
+        raise
     return module
 
 
+def _has_test_case(module) -> bool:
+    """True if the module defines or imports any unittest.TestCase subclass."""
+    unittest = sys.modules.get("unittest")
+    if unittest is None:
+        # Nothing imported unittest, so no TestCase subclass can exist
+        return False
+    return any(isinstance(v, type) and issubclass(v, unittest.TestCase)
+               for v in vars(module).values())
+
+
+# Separator line used in per-module reports
+_BANNER = "=" * 50 + "\n"
+
+
 def run_unittest_module(module, verbose: bool = False) -> Optional[TestResult]:
     """Run unittest.TestCase classes in a module."""
+    import io
+    import unittest
+
     loader = unittest.TestLoader()
+    # Only pass/fail counts are reported, so skip sorting test method names
+    loader.sortTestMethodsUsing = None
     suite = loader.loadTestsFromModule(module)
 
     if suite.countTestCases() == 0:
@@ -79,51 +124,66 @@ def run_unittest_module(module, verbose: bool = False) -> Optional[TestResult]:
     failed = len(result.failures) + len(result.errors)
 
     # Format output
-    output = f"Test Suite: {module.__name__}\n"
-    output += "=" * 50 + "\n"
+    if failed == 0 and passed > 0 and not verbose:
+        # Common case: nothing to list, so build the report in one go
+        return TestResult(
+            name=module.__name__,
+            passed=passed,
+            failed=failed,
+            output=(f"Test Suite: {module.__name__}\n{_BANNER}"
+                    f"[PASS] {passed} tests passed\n{_BANNER}"
+                    f"Total: {passed}/{result.testsRun} passed\n")
+        )
+
+    parts = [f"Test Suite: {module.__name__}\n", _BANNER]
     if verbose:
-        output += stream.getvalue()
+        parts.append(stream.getvalue())
     for test, _ in result.failures:
-        output += f"[FAIL] {test}\n"
+        parts.append(f"[FAIL] {test}\n")
     for test, _ in result.errors:
-        output += f"[ERROR] {test}\n"
+        parts.append(f"[ERROR] {test}\n")
     if passed > 0 and not verbose:
-        output += f"[PASS] {passed} tests passed\n"
-    output += "=" * 50 + "\n"
-    output += f"Total: {passed}/{result.testsRun} passed\n"
+        parts.append(f"[PASS] {passed} tests passed\n")
+    parts.append(_BANNER)
+    parts.append(f"Total: {passed}/{result.testsRun} passed\n")
 
     return TestResult(
         name=module.__name__,
         passed=passed,
         failed=failed,
-        output=output
+        output="".join(parts)
     )
 
 
+# Custom (non-HtnTestSuite, non-unittest) suite classes we know how to drive
+_SUITE_CLASSES = ('LinterTestSuite', 'AnalyzerTestSuite')
+
+
 def run_custom_suite_module(module, verbose: bool = False) -> Optional[TestResult]:
     """Run modules with custom test suite classes (LinterTestSuite, AnalyzerTestSuite)."""
     # Check for known custom suite classes
-    suite_classes = ['LinterTestSuite', 'AnalyzerTestSuite']
-
-    for class_name in suite_classes:
-        if hasattr(module, class_name):
-            suite_class = getattr(module, class_name)
+    for class_name in _SUITE_CLASSES:
+        suite_class = getattr(module, class_name, None)
+        if suite_class is not None:
             suite = suite_class(verbose=verbose)
 
             # Run the test functions that populate the suite
-            # Look for run_*_tests functions
-            for name in dir(module):
-                if name.startswith('run_') and name.endswith('_tests') and callable(getattr(module, name)):
-                    func = getattr(module, name)
+            # Look for run_*_tests functions, run in alphabetical order
+            module_vars = vars(module)
+            for name in sorted(name for name in module_vars
+                               if name.startswith('run_') and name.endswith('_tests')):
+                func = module_vars[name]
+                if callable(func):
                     try:
                         func(suite)
                     except TypeError:
                         pass
 
             # Also try run_good_file_tests pattern
-            if hasattr(module, 'run_good_file_tests'):
+            run_good_file_tests = getattr(module, 'run_good_file_tests', None)
+            if run_good_file_tests is not None:
                 try:
-                    module.run_good_file_tests(suite)
+                    run_good_file_tests(suite)
                 except TypeError:
                     pass
 
@@ -139,11 +199,12 @@ def run_custom_suite_module(module, verbose: bool = False) -> Optional[TestResul
     return None
 
 
-def run_test_module(module, verbose: bool = False) -> Optional[TestResult]:
-    """Run tests from a module, trying multiple test frameworks."""
-    # 1. Try HtnTestSuite (run_tests() or get_suite())
-    if hasattr(module, 'run_tests'):
-        result = module.run_tests(verbose=verbose)
+def _run_htn_suite(entry_point: str) -> Callable[[Any, bool], Optional[TestResult]]:
+    """Strategy: call run_tests()/get_suite() and report the HtnTestSuite it returns."""
+    def run(module, verbose: bool) -> Optional[TestResult]:
+        if not hasattr(module, entry_point):
+            return None
+        result = getattr(module, entry_point)(verbose=verbose)
         if isinstance(result, HtnTestSuite):
             return TestResult(
                 name=module.__name__,
@@ -151,31 +212,122 @@ def run_test_module(module, verbose: bool = False) -> Optional[TestResult]:
                 failed=result.tests_run - result.tests_passed,
                 output=result.summary()
             )
+        return None
+    return run
 
-    if hasattr(module, 'get_suite'):
-        result = module.get_suite(verbose=verbose)
-        if isinstance(result, HtnTestSuite):
-            return TestResult(
-                name=module.__name__,
-                passed=result.tests_passed,
-                failed=result.tests_run - result.tests_passed,
-                output=result.summary()
-            )
 
-    # 2. Try unittest.TestCase classes
-    unittest_result = run_unittest_module(module, verbose)
-    if unittest_result:
-        return unittest_result
+def _run_unittest(module, verbose: bool) -> Optional[TestResult]:
+    """Strategy: run unittest.TestCase classes (skipping the loader's
+    reflective scan when the module defines none)."""
+    if _has_test_case(module):
+        return run_unittest_module(module, verbose)
+    return None
+
+
+# Frameworks in the order they are tried:
+# 1. HtnTestSuite (run_tests() or get_suite())
+# 2. unittest.TestCase classes
+# 3. Custom suite classes (LinterTestSuite, AnalyzerTestSuite)
+_STRATEGIES = (
+    _run_htn_suite('run_tests'),
+    _run_htn_suite('get_suite'),
+    _run_unittest,
+    run_custom_suite_module,
+)
+
+# Strategy that produced a result for each module, keyed by id(module).
+# The module's __spec__ is stored alongside so a reloaded module is re-probed.
+_DISPATCH_CACHE: Dict[int, Tuple[Any, Callable[[Any, bool], Optional[TestResult]]]] = {}
 
-    # 3. Try custom suite classes (LinterTestSuite, AnalyzerTestSuite)
-    custom_result = run_custom_suite_module(module, verbose)
-    if custom_result:
-        return custom_result
 
-    # 4. No compatible tests found
+def _no_tests(module, verbose: bool) -> None:
+    return None
+
+
+def run_test_module(module, verbose: bool = False) -> Optional[TestResult]:
+    """Run tests from a module, trying multiple test frameworks."""
+    cached = _DISPATCH_CACHE.get(id(module))
+    if cached is not None and cached[0] is module.__spec__:
+        return cached[1](module, verbose)
+
+    for strategy in _STRATEGIES:
+        result = strategy(module, verbose)
+        if result:
+            _DISPATCH_CACHE[id(module)] = (module.__spec__, strategy)
+            return result
+
+    # No compatible tests found
+    _DISPATCH_CACHE[id(module)] = (module.__spec__, _no_tests)
     return None
 
 
+def _run_one(tests_dir: str, module_name: str, verbose: bool) -> Dict[str, Any]:
+    """Load and run a single test module.
+
+    Returns a plain dict so it can be sent back from a worker process:
+    {"name", "passed", "failed", "output"} on success, {"name", "error",
+    "traceback"} if loading or running raised, and {"name", "skipped"} when
+    the module has no compatible tests.
+    """
+    try:
+        module = load_test_module(tests_dir, module_name)
+        result = run_test_module(module, verbose=verbose)
+    except Exception as e:
+        import traceback
+        return {
+            "name": module_name,
+            "error": str(e),
+            "traceback": traceback.format_exc()
+        }
+
+    if result is None:
+        return {"name": module_name, "skipped": True}
+
+    return {
+        "name": module_name,
+        "passed": result.passed,
+        "failed": result.failed,
+        "output": result.output
+    }
+
+
+def _run_one_captured(tests_dir: str, module_name: str, verbose: bool) -> Dict[str, Any]:
+    """_run_one() for a worker process, with anything the module prints captured.
+
+    The captured text is returned under "stdout" and "stderr" so the parent can
+    replay it in file order instead of workers interleaving on the terminal.
+    Output written straight to the file descriptors (e.g. by the native
+    library) is not captured.
+    """
+    import io
+    from contextlib import redirect_stderr, redirect_stdout
+    out = io.StringIO()
+    err = io.StringIO()
+    with redirect_stdout(out), redirect_stderr(err):
+        res = _run_one(tests_dir, module_name, verbose)
+    res["stdout"] = out.getvalue()
+    res["stderr"] = err.getvalue()
+    return res
+
+
+def _iter_results(tests_dir: str, test_files: List[str], verbose: bool) -> Iterator[Dict[str, Any]]:
+    """Yield _run_one() results in test_files order, as each becomes available.
+
+    Modules are independent, so several are run in worker processes; map()
+    yields in input order, keeping the report deterministic. Worker results
+    carry the module's captured output, see _run_one_captured().
+    """
+    if len(test_files) == 1:
+        yield _run_one(tests_dir, test_files[0], verbose)
+        return
+
+    sys.stdout.flush()  # Don't let forked workers inherit buffered output
+    from concurrent.futures import ProcessPoolExecutor
+    workers = min(len(test_files), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_run_one_captured, repeat(tests_dir), test_files, repeat(verbose))
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="HTN Test Suite - Run tests for HTN rulesets"
@@ -235,64 +387,76 @@ def main():
     if args.file:
         # Convert "Taxi.htn" to "test_taxi"
         htn_name = args.file.replace(".htn", "").lower()
-        matching = [tf for tf in test_files if htn_name in tf.lower()]
+        lower_files = [(tf, tf.lower()) for tf in test_files]
+        matching = [tf for tf, tf_lower in lower_files if htn_name in tf_lower]
         if not matching:
             print(f"No test file found for '{args.file}'")
             print(f"Available: {test_files}")
             return 1
         test_files = matching
 
-    # Run tests
+    # Run tests, reporting each module as soon as its result arrives
     all_results: List[Dict[str, Any]] = []
     total_passed = 0
     total_run = 0
 
-    for test_module_name in test_files:
-        try:
-            module = load_test_module(tests_dir, test_module_name)
-            result = run_test_module(module, verbose=args.verbose)
-
-            # Skip modules with no compatible tests
-            if result is None:
-                continue
-
-            total_passed += result.passed
-            total_run += result.total
+    for res in _iter_results(tests_dir, test_files, args.verbose):
+        test_module_name = res["name"]
 
-            if args.json:
-                all_results.append({
-                    "test_module": test_module_name,
-                    "tests_run": result.total,
-                    "tests_passed": result.passed,
-                    "tests_failed": result.failed
-                })
-            else:
-                print(result.output)
-                print()
+        # Replay what the module printed while it ran in a worker
+        if res.get("stdout"):
+            sys.stdout.write(res["stdout"])
+        if res.get("stderr"):
+            sys.stderr.write(res["stderr"])
 
-        except Exception as e:
+        if "error" in res:
             if args.json:
                 all_results.append({
                     "test_module": test_module_name,
-                    "error": str(e),
+                    "error": res["error"],
                     "tests_run": 0,
                     "tests_passed": 0,
                     "tests_failed": 0
                 })
             else:
-                print(f"Error running {test_module_name}: {e}")
-                import traceback
-                traceback.print_exc()
+                print(f"Error running {test_module_name}: {res['error']}")
+                sys.stderr.write(res["traceback"])
+            continue
+
+        # Skip modules with no compatible tests
+        if res.get("skipped"):
+            continue
+
+        total_passed += res["passed"]
+        total_run += res["passed"] + res["failed"]
+
+        if args.json:
+            all_results.append({
+                "test_module": test_module_name,
+                "tests_run": res["passed"] + res["failed"],
+                "tests_passed": res["passed"],
+                "tests_failed": res["failed"]
+            })
+        else:
+            # Print as each module finishes so only one report is held at a time
+            print(res["output"])
+            print(flush=True)
 
     # Output
     if args.json:
+        import json
         output = {
             "total_run": total_run,
             "total_passed": total_passed,
             "total_failed": total_run - total_passed,
             "suites": all_results
         }
-        print(json.dumps(output, indent=2))
+        # Pretty-print for terminals, compact when piped to another program
+        if sys.stdout.isatty():
+            json.dump(output, sys.stdout, indent=2)
+        else:
+            json.dump(output, sys.stdout, separators=(",", ":"))
+        sys.stdout.write("\n")
     else:
         print("=" * 50)
         print(f"TOTAL: {total_passed}/{total_run} tests passed")
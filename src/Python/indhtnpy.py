@@ -1,13 +1,23 @@
 import ctypes
-import ctypes.util
-import json
 import logging
-import platform
+import re
+import struct
 import sys
+import weakref
 from contextlib import contextmanager
-from sys import platform
+from functools import lru_cache
 from time import perf_counter_ns
 
+# orjson parses large planner results several times faster than the standard
+# library, but is optional. Both accept str or bytes, only orjson accepts a
+# memoryview so results can be parsed straight out of the library's buffer
+try:
+    from orjson import loads as _json_loads
+    _jsonLoadsBuffers = True
+except ImportError:
+    from json import loads as _json_loads
+    _jsonLoadsBuffers = False
+
 
 # Mirror of C++ SystemTraceType enum - designed as bitfield flags
 class SystemTraceType:
@@ -32,6 +42,14 @@ class TraceDetail:
 
 perfLogger = logging.getLogger("indhtnpy.performance")
 
+# Bound once at module level, these are called on every wrapper call
+_byref = ctypes.byref
+_string_at = ctypes.string_at
+
+# Queries are often issued again verbatim (search loops, test suites), so their UTF-8
+# bytes are cached. Compile inputs are whole rulesets and are encoded every time
+_encodeQuery = lru_cache(maxsize=1024)(str.encode)
+
 """ 
 This is a python wrapper around self.indhtnLib, which is itself the library of functions in PythonWrapper.py
 This library also contains a single class HtnPlannerPythonWrapper that is stored in self.obj
@@ -46,406 +64,634 @@ This library also contains a single class HtnPlannerPythonWrapper that is stored
 #  2. a Prolog list represented as a Python list (a list is also a term in Prolog):
 #       [{ "TermName": [{"Arg1TermName":[]}, {"Arg2TermName":[]}] }]
 def termArgs(term):
-    if termIsList(term):
-        # really should call termIsList() and not call termArgs
-        return None
-    elif not isinstance(term, dict):
-        # handle variables as terms
+    if type(term) is not dict:
+        # Lists have no args (really should call termIsList() and not call termArgs)
+        # and neither do variables
         return None
     else:
-        return list(term.values())[0]
+        return next(iter(term.values()))
 
 
 def termIsConstant(term):
-    if termIsList(term):
+    termType = type(term)
+    if termType is list:
         # really should call termIsList() and not call termName
         return None
+    elif termType is not dict:
+        # is a variable
+        return True
     else:
-        args = termArgs(term)
-        if args is None:
-            # is a variable
-            return True
-        else:
-            return len(args) == 0
+        return len(next(iter(term.values()))) == 0
 
 
 def termName(term):
-    if termIsList(term):
+    if type(term) is list:
         # really should call termIsList() and not call termName
         return None
     else:
-        return list(term)[0]
+        return next(iter(term))
 
 
+# type() is compared directly since parsed json only ever produces plain lists
 def termIsList(term):
-    return isinstance(term, list)
+    return type(term) is list
+
+
+# Failure results from PrologQuery() and FindAllPlans() always start with the false
+# term: [{"false" :[]}, {"failureIndex" :[...]}, ...Any Terms in FailureContext...]
+# Solutions never do (variable names can't be false and plans are lists)
+_FAILURE_PREFIX = re.compile(r'\s*\[\s*\{\s*"false"\s*:')
+_FAILURE_PREFIX_BYTES = re.compile(rb'\s*\[\s*\{\s*"false"\s*:')
+
+
+# Returns True if queryResult (the json str or bytes of solutions) is a failure,
+# without parsing it. Lets callers that only need to know if there were solutions
+# skip json parsing the failure context
+def resultIsFailure(queryResult):
+    if type(queryResult) is bytes:
+        return _FAILURE_PREFIX_BYTES.match(queryResult) is not None
+    return _FAILURE_PREFIX.match(queryResult) is not None
 
 
 # Properly converts all solutions (or errors) returned
 # from a prolog query into a list of strings with Prolog predicates
+# queryResult can be the str from PrologQuery() or the bytes from PrologQueryRaw()
 def queryResultToPrologStringList(queryResult):
-    jsonQuery = json.loads(queryResult)
-    solutionList = []
+    jsonQuery = _json_loads(queryResult)
     if "false" in jsonQuery[0]:
         # Query failed, so it is not a unification list it
         # is a term list
-        solutionList.append(termListToString(jsonQuery))
-    else:
-        for solution in jsonQuery:
-            assignmentList = []
-            for variableName in solution.keys():
-                assignmentList.append(
-                    "{} = {}".format(variableName, termToString(solution[variableName]))
-                )
-            solutionList.append(", ".join(assignmentList))
+        return [termListToString(jsonQuery)]
 
-    return solutionList
+    toString = termToString
+    return [
+        ", ".join(
+            f"{variableName} = {toString(value)}"
+            for variableName, value in solution.items()
+        )
+        for solution in jsonQuery
+    ]
 
 
 # Properly converts all solutions (or errors) returned from FindAllPlans()
 # into a list of strings with Prolog predicates
 def findAllPlansResultToPrologStringList(queryResult):
-    jsonSolutions = json.loads(queryResult)
-    solutionList = []
-    if "false" in jsonSolutions[0]:
+    return findAllPlansJsonToPrologStringList(_json_loads(queryResult))
+
+
+# Same as findAllPlansResultToPrologStringList() but takes the already
+# parsed json so callers that also inspect the solutions only parse once
+def findAllPlansJsonToPrologStringList(jsonSolutions):
+    # Solutions are lists of operators, and "in" on a list would compare "false"
+    # against every operator of the first plan, so only look in the failure's dict
+    first = jsonSolutions[0]
+    if type(first) is dict and "false" in first:
         # failed, so it is not a list of solutions it
         # is a term list
-        solutionList.append(termListToString(jsonSolutions))
-    else:
-        for solution in jsonSolutions:
-            solutionList.append(termListToString(solution))
+        return [termListToString(jsonSolutions)]
 
-    return solutionList
+    return [termListToString(solution) for solution in jsonSolutions]
 
 
 def termListToString(termList):
-    termStringList = []
+    parts = []
     for term in termList:
-        termStringList.append(termToString(term))
-    return ", ".join(termStringList)
+        if parts:
+            parts.append(", ")
+        _appendTermString(term, parts)
+    return "".join(parts)
 
 
 def termToString(term):
-    if isinstance(term, str):
+    if type(term) is str:
         return term
-    elif termIsList(term):
-        value = "["
-        hasItem = False
-        for listItem in term:
-            if hasItem:
-                value += ", "
-            value += termToString(listItem)
-            hasItem = True
-        value += "]"
-    else:
-        value = termName(term)
-        if not termIsConstant(term):
-            value += "("
-            hasArgs = False
-            for argTerm in termArgs(term):
-                if hasArgs:
-                    value += ", "
-                value += termToString(argTerm)
-                hasArgs = True
-            value += ")"
-    return value
+    parts = []
+    _appendTermString(term, parts)
+    return "".join(parts)
+
+
+# Punctuation is pushed on the termToString stack as 1-tuples so it can't be
+# confused with a term (which is a str, list or dict)
+_LIST_END = ("]",)
+_ARGS_END = (")",)
+_SEPARATOR = (", ",)
+
+
+# Appends the strings that make up term to parts. Uses an explicit stack
+# instead of recursion so deep terms don't hit the recursion limit, and
+# builds a list of pieces so the caller only joins once
+def _appendTermString(term, parts):
+    stack = [term]
+    while stack:
+        term = stack.pop()
+        termType = type(term)
+        if termType is str:
+            parts.append(term)
+            continue
+        elif termType is tuple:
+            parts.append(term[0])
+            continue
+        elif termType is list:
+            parts.append("[")
+            end = _LIST_END
+        else:
+            # Read the name and args straight off the one-key dict instead of
+            # going through termName()/termArgs(), this runs for every node
+            for name, term in term.items():
+                parts.append(name)
+            if not term:
+                continue
+            parts.append("(")
+            end = _ARGS_END
+
+        # term is now the items of the list or args. Push them so they pop in
+        # order, separated by ", " and followed by end. Done inline rather than
+        # in a helper since it runs for every compound term and list
+        stack.append(end)
+        for index in range(len(term) - 1, 0, -1):
+            stack.append(term[index])
+            stack.append(_SEPARATOR)
+        if term:
+            stack.append(term[0])
+
+
+# The loaded indhtnpy library, shared by every HtnPlanner. Resolving its path
+# probes the filesystem (and find_library can spawn processes) so it is only
+# done the first time a planner is created
+_indhtnLib = None
+
+
+def _loadLibrary():
+    global _indhtnLib
+    if _indhtnLib is None:
+        lib = _openLibrary()
+        _declareFunctions(lib)
+        _indhtnLib = lib
+    return _indhtnLib
+
+
+def _openLibrary():
+    if sys.platform.startswith("linux"):
+        libname = "/usr/bin/libindhtnpy.so"
+        return ctypes.CDLL(libname)
+
+    # ctypes.util pulls in subprocess, only import it when it might be needed. Importing
+    # the function rather than the module keeps ctypes a global in this function
+    from ctypes.util import find_library
+    import os
+    if sys.platform == "darwin":
+        # macOS
+        libname = "libindhtnpy.dylib"
+        search_paths = [
+            os.path.join(os.path.dirname(__file__), libname),  # Same directory as this file
+            os.path.join(os.getcwd(), libname),  # Current working directory
+            os.path.join(os.getcwd(), "src", "Python", libname),  # src/Python from root
+        ]
+        indhtnPath = None
+        for path in search_paths:
+            if os.path.exists(path):
+                indhtnPath = path
+                break
+        if not indhtnPath:
+            indhtnPath = find_library("indhtnpy")
+    elif sys.platform == "win32":
+        # Windows...
+        # Try multiple locations for the DLL
+        search_paths = [
+            os.path.join(os.path.dirname(__file__), "indhtnpy.dll"),  # Same directory as this file
+            os.path.join(os.getcwd(), "indhtnpy.dll"),  # Current working directory
+            os.path.join(os.getcwd(), "src", "Python", "indhtnpy.dll"),  # src/Python from root
+        ]
 
+        indhtnPath = None
+        for path in search_paths:
+            if os.path.exists(path):
+                indhtnPath = os.path.abspath(path)
+                break
 
-class HtnPlanner(object):
-    def __init__(self, debug=False):
-        # Load the library
-        if platform == "linux" or platform == "linux2":
-            libname = "/usr/bin/libindhtnpy.so"
-            self.indhtnLib = ctypes.CDLL(libname)
+        if indhtnPath:
+            # Let the loader find any DLLs indhtnpy.dll depends on next to it
+            os.add_dll_directory(os.path.dirname(indhtnPath))
         else:
-            if platform == "darwin":
-                # macOS
-                import os
-                libname = "libindhtnpy.dylib"
-                search_paths = [
-                    os.path.join(os.path.dirname(__file__), libname),  # Same directory as this file
-                    os.path.join(os.getcwd(), libname),  # Current working directory
-                    os.path.join(os.getcwd(), "src", "Python", libname),  # src/Python from root
-                ]
-                indhtnPath = None
-                for path in search_paths:
-                    if os.path.exists(path):
-                        indhtnPath = path
-                        break
-                if not indhtnPath:
-                    indhtnPath = ctypes.util.find_library("indhtnpy")
-            elif platform == "win32":
-                # Windows...
-                import os
-                # Try multiple locations for the DLL
-                search_paths = [
-                    os.path.join(os.path.dirname(__file__), "indhtnpy.dll"),  # Same directory as this file
-                    os.path.join(os.getcwd(), "indhtnpy.dll"),  # Current working directory
-                    os.path.join(os.getcwd(), "src", "Python", "indhtnpy.dll"),  # src/Python from root
-                ]
-
-                indhtnPath = None
-                for path in search_paths:
-                    if os.path.exists(path):
-                        indhtnPath = path
-                        break
-
-                # Fallback to find_library if not found in common locations
-                if not indhtnPath:
-                    libname = "./indhtnpy"
-                    indhtnPath = ctypes.util.find_library(libname)
-            else:
-                print("Unknown OS: {}".format(platform))
-                sys.exit()
+            # Fallback to find_library if not found in common locations
+            libname = "./indhtnpy"
+            indhtnPath = find_library(libname)
+    else:
+        print("Unknown OS: {}".format(sys.platform))
+        sys.exit()
 
-            if not indhtnPath:
-                print(
-                    "Unable to find the indhtnpy library, please make sure it is on your path."
-                )
-                sys.exit()
-            try:
-                self.indhtnLib = ctypes.CDLL(indhtnPath)
-            except OSError:
-                print("Unable to load the indhtnpy library.")
-                sys.exit()
-
-        # Declare all the function metadata
-        self.indhtnLib.SetMemoryBudget.argtypes = [ctypes.c_void_p, ctypes.c_int64]
-        self.indhtnLib.CreateHtnPlanner.restype = ctypes.c_void_p
-        self.indhtnLib.CreateHtnPlanner.argtypes = [ctypes.c_bool]
-        self.indhtnLib.DeleteHtnPlanner.argtypes = [ctypes.c_void_p]
-        self.indhtnLib.HtnApplySolution.restype = ctypes.c_bool
-        self.indhtnLib.HtnApplySolution.argtypes = [ctypes.c_void_p, ctypes.c_int64]
-        self.indhtnLib.HtnCompile.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
-        self.indhtnLib.HtnCompile.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.PrologCompile.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
-        self.indhtnLib.PrologCompile.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.HtnCompileCustomVariables.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_char_p,
-        ]
-        self.indhtnLib.HtnCompileCustomVariables.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.PrologCompileCustomVariables.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_char_p,
-        ]
-        self.indhtnLib.PrologCompileCustomVariables.restype = ctypes.POINTER(
-            ctypes.c_char
-        )
-        self.indhtnLib.Compile.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
-        self.indhtnLib.Compile.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.FreeString.argtypes = [ctypes.POINTER(ctypes.c_char)]
-        self.indhtnLib.HtnFindAllPlans.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_char_p,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.HtnFindAllPlans.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.HtnFindAllPlansCustomVariables.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_char_p,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.HtnFindAllPlansCustomVariables.restype = ctypes.POINTER(
-            ctypes.c_char
+    if not indhtnPath:
+        print(
+            "Unable to find the indhtnpy library, please make sure it is on your path."
         )
-        self.indhtnLib.PrologQuery.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_char_p,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.PrologQuery.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.PrologSolveGoals.argtypes = [
-            ctypes.c_void_p,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.PrologSolveGoals.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.SetDebugTracing.argtypes = [ctypes.c_int64]
-        self.indhtnLib.SetLogLevel.argtypes = [ctypes.c_int, ctypes.c_int]
-        self.indhtnLib.StartTraceCapture.argtypes = []
-        self.indhtnLib.StartTraceCaptureEx.argtypes = [ctypes.c_bool]
-        self.indhtnLib.StopTraceCapture.argtypes = []
-        self.indhtnLib.GetCapturedTraces.argtypes = []
-        self.indhtnLib.GetCapturedTraces.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.ClearTraceBuffer.argtypes = []
-        self.indhtnLib.LogStdErrToFile.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
-        self.indhtnLib.PrologQueryToJson.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_char_p,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.PrologQueryToJson.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.HtnGetDecompositionTree.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_uint64,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.HtnGetDecompositionTree.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.HtnGetStateFacts.argtypes = [
-            ctypes.c_void_p,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.HtnGetStateFacts.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.HtnGetGoalsCustomVariables.argtypes = [
-            ctypes.c_void_p,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.HtnGetGoalsCustomVariables.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.HtnGetGoals.argtypes = [
-            ctypes.c_void_p,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.HtnGetGoals.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.HtnGetSolutionFacts.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_uint64,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.HtnGetSolutionFacts.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.HtnGetParallelizedPlan.argtypes = [
-            ctypes.c_void_p,
-            ctypes.c_uint64,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.HtnGetParallelizedPlan.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.HtnGetChoiceData.argtypes = [
-            ctypes.c_void_p,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.HtnGetChoiceData.restype = ctypes.POINTER(ctypes.c_char)
-        self.indhtnLib.HtnGetChoiceStats.argtypes = [
-            ctypes.c_void_p,
-            ctypes.POINTER(ctypes.POINTER(ctypes.c_char)),
-        ]
-        self.indhtnLib.HtnGetChoiceStats.restype = ctypes.POINTER(ctypes.c_char)
-        # Resolution step counter (enabled by default, disable with -DINDHTN_TRACK_RESOLUTION_STEPS=OFF)
-        self.indhtnLib.GetLastResolutionStepCount.argtypes = [ctypes.c_void_p]
-        self.indhtnLib.GetLastResolutionStepCount.restype = ctypes.c_int64
+        sys.exit()
+    try:
+        return ctypes.CDLL(indhtnPath)
+    except OSError:
+        print("Unable to load the indhtnpy library.")
+        sys.exit()
+
+
+# Declare all the function metadata. argtypes/restype belong to the library,
+# not to a planner, so this runs once when the library is loaded
+def _declareFunctions(lib):
+    lib.SetMemoryBudget.argtypes = [ctypes.c_void_p, ctypes.c_int64]
+    lib.CreateHtnPlanner.restype = ctypes.c_void_p
+    lib.CreateHtnPlanner.argtypes = [ctypes.c_bool]
+    lib.DeleteHtnPlanner.argtypes = [ctypes.c_void_p]
+    lib.HtnApplySolution.restype = ctypes.c_bool
+    lib.HtnApplySolution.argtypes = [ctypes.c_void_p, ctypes.c_int64]
+    lib.HtnCompile.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    lib.HtnCompile.restype = ctypes.c_void_p
+    lib.PrologCompile.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    lib.PrologCompile.restype = ctypes.c_void_p
+    lib.HtnCompileCustomVariables.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_char_p,
+    ]
+    lib.HtnCompileCustomVariables.restype = ctypes.c_void_p
+    lib.PrologCompileCustomVariables.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_char_p,
+    ]
+    lib.PrologCompileCustomVariables.restype = ctypes.c_void_p
+    lib.Compile.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    lib.Compile.restype = ctypes.c_void_p
+    lib.FreeString.argtypes = [ctypes.c_void_p]
+    lib.StringLength.argtypes = [ctypes.c_void_p]
+    lib.StringLength.restype = ctypes.c_uint64
+    lib.HtnFindAllPlans.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_char_p,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.HtnFindAllPlans.restype = ctypes.c_void_p
+    lib.HtnFindAllPlansCustomVariables.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_char_p,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.HtnFindAllPlansCustomVariables.restype = ctypes.c_void_p
+    lib.PrologQuery.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_char_p,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.PrologQuery.restype = ctypes.c_void_p
+    lib.PrologQueryBatch.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_char_p,
+        ctypes.c_int,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.PrologQueryBatch.restype = ctypes.c_void_p
+    lib.PrologSolveGoals.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.PrologSolveGoals.restype = ctypes.c_void_p
+    lib.SetDebugTracing.argtypes = [ctypes.c_int64]
+    lib.SetLogLevel.argtypes = [ctypes.c_int, ctypes.c_int]
+    lib.StartTraceCapture.argtypes = []
+    lib.StartTraceCaptureEx.argtypes = [ctypes.c_bool]
+    lib.StopTraceCapture.argtypes = []
+    lib.GetCapturedTraces.argtypes = []
+    lib.GetCapturedTraces.restype = ctypes.c_void_p
+    lib.ClearTraceBuffer.argtypes = []
+    lib.LogStdErrToFile.argtypes = [ctypes.c_void_p, ctypes.c_char_p]
+    lib.PrologQueryToJson.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_char_p,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.PrologQueryToJson.restype = ctypes.c_void_p
+    lib.HtnGetDecompositionTree.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_uint64,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.HtnGetDecompositionTree.restype = ctypes.c_void_p
+    lib.HtnGetStateFacts.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.HtnGetStateFacts.restype = ctypes.c_void_p
+    lib.HtnGetStateFactsArray.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.POINTER(ctypes.c_char_p)),
+        ctypes.POINTER(ctypes.c_uint64),
+    ]
+    lib.HtnGetStateFactsArray.restype = ctypes.c_void_p
+    lib.HtnGetSolutionFactsArray.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_uint64,
+        ctypes.POINTER(ctypes.POINTER(ctypes.c_char_p)),
+        ctypes.POINTER(ctypes.c_uint64),
+    ]
+    lib.HtnGetSolutionFactsArray.restype = ctypes.c_void_p
+    lib.FreeStringArray.argtypes = [
+        ctypes.POINTER(ctypes.c_char_p),
+        ctypes.c_uint64,
+    ]
+    lib.HtnGetGoalsCustomVariables.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.HtnGetGoalsCustomVariables.restype = ctypes.c_void_p
+    lib.HtnGetGoals.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.HtnGetGoals.restype = ctypes.c_void_p
+    lib.HtnGetSolutionFacts.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_uint64,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.HtnGetSolutionFacts.restype = ctypes.c_void_p
+    lib.HtnGetParallelizedPlan.argtypes = [
+        ctypes.c_void_p,
+        ctypes.c_uint64,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.HtnGetParallelizedPlan.restype = ctypes.c_void_p
+    lib.HtnGetChoiceData.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.HtnGetChoiceData.restype = ctypes.c_void_p
+    lib.HtnGetChoiceStats.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.c_void_p),
+    ]
+    lib.HtnGetChoiceStats.restype = ctypes.c_void_p
+    # Resolution step counter (enabled by default, disable with -DINDHTN_TRACK_RESOLUTION_STEPS=OFF)
+    lib.GetLastResolutionStepCount.argtypes = [ctypes.c_void_p]
+    lib.GetLastResolutionStepCount.restype = ctypes.c_int64
+
+
+# The library is loaded with CDLL, so ctypes releases the GIL for the whole of every
+# call and planners on different threads run in parallel. A planner itself (its out
+# parameter, cache and C++ state) must only be used by one thread at a time
+class HtnPlanner(object):
+    # Every attribute set in __init__. Planners are created a lot (one per test) and
+    # the wrappers read these on every call, slots make both cheaper than a __dict__
+    __slots__ = (
+        "indhtnLib",
+        "obj",
+        "_outPtr",
+        "_outRef",
+        "_queryCache",
+        "_SetDebugTracing",
+        "_SetLogLevel",
+        "_StartTraceCaptureEx",
+        "_StartTraceCapture",
+        "_StopTraceCapture",
+        "_GetCapturedTraces",
+        "_FreeString",
+        "_StringLength",
+        "_ClearTraceBuffer",
+        "_SetMemoryBudget",
+        "_LogStdErrToFile",
+        "_HtnApplySolution",
+        "_HtnCompile",
+        "_HtnCompileCustomVariables",
+        "_PrologCompile",
+        "_PrologCompileCustomVariables",
+        "_Compile",
+        "_HtnFindAllPlans",
+        "_HtnFindAllPlansCustomVariables",
+        "_PrologQuery",
+        "_PrologQueryBatch",
+        "_PrologSolveGoals",
+        "_PrologQueryToJson",
+        "_HtnGetDecompositionTree",
+        "_GetLastResolutionStepCount",
+        "_HtnGetStateFacts",
+        "_HtnGetStateFactsArray",
+        "_HtnGetSolutionFactsArray",
+        "_FreeStringArray",
+        "_HtnGetGoalsCustomVariables",
+        "_HtnGetGoals",
+        "_HtnGetSolutionFacts",
+        "_HtnGetParallelizedPlan",
+        "_HtnGetChoiceData",
+        "_HtnGetChoiceStats",
+        "_DeleteHtnPlanner",
+        "__weakref__",
+    )
 
-        # Now create an instance of the object
-        self.obj = self.indhtnLib.CreateHtnPlanner(debug)
+    def __init__(self, debug=False):
+        # Load the library
+        self.indhtnLib = _loadLibrary()
+
+        # Cache the function objects so calls skip the CDLL attribute lookup
+        self._SetDebugTracing = self.indhtnLib.SetDebugTracing
+        self._SetLogLevel = self.indhtnLib.SetLogLevel
+        self._StartTraceCaptureEx = self.indhtnLib.StartTraceCaptureEx
+        self._StartTraceCapture = self.indhtnLib.StartTraceCapture
+        self._StopTraceCapture = self.indhtnLib.StopTraceCapture
+        self._GetCapturedTraces = self.indhtnLib.GetCapturedTraces
+        self._FreeString = self.indhtnLib.FreeString
+        self._StringLength = self.indhtnLib.StringLength
+        self._ClearTraceBuffer = self.indhtnLib.ClearTraceBuffer
+        self._SetMemoryBudget = self.indhtnLib.SetMemoryBudget
+        self._LogStdErrToFile = self.indhtnLib.LogStdErrToFile
+        self._HtnApplySolution = self.indhtnLib.HtnApplySolution
+        self._HtnCompile = self.indhtnLib.HtnCompile
+        self._HtnCompileCustomVariables = self.indhtnLib.HtnCompileCustomVariables
+        self._PrologCompile = self.indhtnLib.PrologCompile
+        self._PrologCompileCustomVariables = self.indhtnLib.PrologCompileCustomVariables
+        self._Compile = self.indhtnLib.Compile
+        self._HtnFindAllPlans = self.indhtnLib.HtnFindAllPlans
+        self._HtnFindAllPlansCustomVariables = self.indhtnLib.HtnFindAllPlansCustomVariables
+        self._PrologQuery = self.indhtnLib.PrologQuery
+        self._PrologQueryBatch = self.indhtnLib.PrologQueryBatch
+        self._PrologSolveGoals = self.indhtnLib.PrologSolveGoals
+        self._PrologQueryToJson = self.indhtnLib.PrologQueryToJson
+        self._HtnGetDecompositionTree = self.indhtnLib.HtnGetDecompositionTree
+        self._GetLastResolutionStepCount = self.indhtnLib.GetLastResolutionStepCount
+        self._HtnGetStateFacts = self.indhtnLib.HtnGetStateFacts
+        self._HtnGetStateFactsArray = self.indhtnLib.HtnGetStateFactsArray
+        self._HtnGetSolutionFactsArray = self.indhtnLib.HtnGetSolutionFactsArray
+        self._FreeStringArray = self.indhtnLib.FreeStringArray
+        self._HtnGetGoalsCustomVariables = self.indhtnLib.HtnGetGoalsCustomVariables
+        self._HtnGetGoals = self.indhtnLib.HtnGetGoals
+        self._HtnGetSolutionFacts = self.indhtnLib.HtnGetSolutionFacts
+        self._HtnGetParallelizedPlan = self.indhtnLib.HtnGetParallelizedPlan
+        self._HtnGetChoiceData = self.indhtnLib.HtnGetChoiceData
+        self._HtnGetChoiceStats = self.indhtnLib.HtnGetChoiceStats
+        self._DeleteHtnPlanner = self.indhtnLib.DeleteHtnPlanner
+
+        # Out parameter for the char** results, reused by every call instead of allocating
+        # a new pointer each time. Each wrapper nulls it before the call and passes
+        # _outRef, a byref() to it made once here
+        self._outPtr = ctypes.c_void_p()
+        self._outRef = ctypes.byref(self._outPtr)
+
+        # PrologQuery() results by query text, None unless SetQueryCaching(True) was called
+        self._queryCache = None
+
+        # Now create an instance of the object. It is kept as a c_void_p rather than the int
+        # the library returns so ctypes can pass it to every call without converting it
+        self.obj = ctypes.c_void_p(self.indhtnLib.CreateHtnPlanner(debug))
+
+        # Deletes the C++ planner once this object is collected. Unlike __del__ this keeps
+        # its own reference to DeleteHtnPlanner, so it still works during interpreter
+        # shutdown, and it doesn't get in the way of collecting reference cycles
+        weakref.finalize(self, self._DeleteHtnPlanner, self.obj)
 
     # debug = True to enable debug tracing, False to turn off
     def SetDebugTracing(self, debug):
-        self.indhtnLib.SetDebugTracing(debug)
+        self._SetDebugTracing(debug)
 
     # Sets the trace filter with specific trace types and detail level
     # traceType = SystemTraceType flags (can be ORed together)
     # traceDetail = TraceDetail level (Normal, Detailed, or Diagnostic)
     def SetLogLevel(self, traceType, traceDetail):
-        self.indhtnLib.SetLogLevel(traceType, traceDetail)
+        self._SetLogLevel(traceType, traceDetail)
 
     # Start capturing trace output to internal buffer (silent by default)
     def StartTraceCapture(self, alsoOutputToStdout=False):
         if alsoOutputToStdout:
-            self.indhtnLib.StartTraceCaptureEx(True)
+            self._StartTraceCaptureEx(True)
         else:
-            self.indhtnLib.StartTraceCapture()
+            self._StartTraceCapture()
 
     # Stop capturing trace output
     def StopTraceCapture(self):
-        self.indhtnLib.StopTraceCapture()
+        self._StopTraceCapture()
 
     # Get all captured traces as a string
     def GetCapturedTraces(self):
-        resultPtr = self.indhtnLib.GetCapturedTraces()
+        resultPtr = self._GetCapturedTraces()
         if resultPtr:
-            resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-            if resultBytes is not None:
-                self.indhtnLib.FreeString(resultPtr)
-                return resultBytes.decode()
+            return self._takeString(resultPtr).decode()
         return ""
 
     # Clear the trace buffer
     def ClearTraceBuffer(self):
-        self.indhtnLib.ClearTraceBuffer()
+        self._ClearTraceBuffer()
 
     # Sets the budget for the planner and prolog compiler to use in bytes
     # i.e. 1K budget should be budgetBytes = 1024
     def SetMemoryBudget(self, budgetBytes):
-        self.indhtnLib.SetMemoryBudget(self.obj, budgetBytes)
+        self.ClearQueryCache()
+        self._SetMemoryBudget(self.obj, budgetBytes)
+
+    # enabled = True to make PrologQuery() remember each result and return it again when
+    # the same query is repeated, without calling into the library. The cache is cleared by
+    # anything that can change the rules or state from here: compiling, planning (FindAllPlans*),
+    # ApplySolution(), SetMemoryBudget(), PrologQueryRaw(), PrologQueryBatch(),
+    # PrologQueryToJson() and PrologSolveGoals().
+    # Only turn it on if the queries sent to PrologQuery() don't change the state themselves
+    # (e.g. with assert() or retract()), and note GetLastResolutionStepCount() is not
+    # updated by a cached result. Off by default
+    def SetQueryCaching(self, enabled):
+        self._queryCache = {} if enabled else None
+
+    def ClearQueryCache(self):
+        if self._queryCache is not None:
+            self._queryCache.clear()
 
     # In addition to logging to stderr, logs to this file.
     # Clears the file every time it is called
     # Pass "" to stop logging
     def LogToFile(self, fileNameAndPath):
-        self.indhtnLib.LogStdErrToFile(
-            self.obj, fileNameAndPath.encode("UTF-8", "strict")
+        self._LogStdErrToFile(
+            self.obj, fileNameAndPath.encode()
         )
 
     # Returns true if the index is in range, false otherwise
     def ApplySolution(self, index):
-        return self.indhtnLib.HtnApplySolution(self.obj, index)
+        self.ClearQueryCache()
+        return self._HtnApplySolution(self.obj, index)
 
     def HtnCompile(self, value):
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.HtnCompile(self.obj, value.encode("UTF-8", "strict"))
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info("HtnCompile %s ms", str(elapsedTimeNS / 1000000))
-
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode()
-        return resultBytes
+        self.ClearQueryCache()
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._HtnCompile(self.obj, value.encode())
+        if perfEnabled:
+            perfLogger.info(
+                "HtnCompile %.3f ms",
+                (perf_counter_ns() - startTime) / 1e6,
+            )
+
+        if resultPtr:
+            return self._takeString(resultPtr).decode()
+        return None
 
     def HtnCompileCustomVariables(self, value):
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.HtnCompileCustomVariables(
-            self.obj, value.encode("UTF-8", "strict")
+        self.ClearQueryCache()
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._HtnCompileCustomVariables(
+            self.obj, value.encode()
         )
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info("HtnCompileCustomVariables %s ms", str(elapsedTimeNS / 1000000))
+        if perfEnabled:
+            perfLogger.info(
+                "HtnCompileCustomVariables %.3f ms",
+                (perf_counter_ns() - startTime) / 1e6,
+            )
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode()
-        return resultBytes
+        if resultPtr:
+            return self._takeString(resultPtr).decode()
+        return None
 
     def PrologCompile(self, value):
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.PrologCompile(
-            self.obj, value.encode("UTF-8", "strict")
+        self.ClearQueryCache()
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._PrologCompile(
+            self.obj, value.encode()
         )
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info("PrologCompile %s ms", str(elapsedTimeNS / 1000000))
+        if perfEnabled:
+            perfLogger.info(
+                "PrologCompile %.3f ms",
+                (perf_counter_ns() - startTime) / 1e6,
+            )
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode()
-        return resultBytes
+        if resultPtr:
+            return self._takeString(resultPtr).decode()
+        return None
 
     def PrologCompileCustomVariables(self, value):
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.PrologCompileCustomVariables(
-            self.obj, value.encode("UTF-8", "strict")
-        )
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info(
-            "PrologCompileCustomVariables %s ms", str(elapsedTimeNS / 1000000)
+        self.ClearQueryCache()
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._PrologCompileCustomVariables(
+            self.obj, value.encode()
         )
+        if perfEnabled:
+            perfLogger.info(
+                "PrologCompileCustomVariables %.3f ms",
+                (perf_counter_ns() - startTime) / 1e6,
+            )
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode()
-        return resultBytes
+        if resultPtr:
+            return self._takeString(resultPtr).decode()
+        return None
 
     def Compile(self, value):
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.Compile(self.obj, value.encode("UTF-8", "strict"))
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info(
-            "PrologCompileCustomVariables %s ms", str(elapsedTimeNS / 1000000)
-        )
+        self.ClearQueryCache()
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._Compile(self.obj, value.encode())
+        if perfEnabled:
+            perfLogger.info(
+                "Compile %.3f ms",
+                (perf_counter_ns() - startTime) / 1e6,
+            )
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode()
-        return resultBytes
+        if resultPtr:
+            return self._takeString(resultPtr).decode()
+        return None
 
     # returns compileError, solutions
     # compileError = None if no compile error, or a string error message OR a string that starts with "out of memory:"
@@ -457,44 +703,66 @@ class HtnPlanner(object):
     #   - If there were solutions it will be a list containing all the solutions
     #       each solution is a list of terms which are the operations that represent the plan
     def FindAllPlans(self, value):
+        error, resultBytes = self.FindAllPlansRaw(value)
+        if error is not None:
+            return error, None
+        return None, resultBytes.decode()
+
+    # Same as FindAllPlans() but solutions is the utf-8 json as bytes, see PrologQueryRaw()
+    def FindAllPlansRaw(self, value):
+        self.ClearQueryCache()
         # Pointer to pointer conversion: https://stackoverflow.com/questions/4213095/python-and-ctypes-how-to-correctly-pass-pointer-to-pointer-into-dll
-        mem = ctypes.POINTER(ctypes.c_char)()
-
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.HtnFindAllPlans(
-            self.obj, value.encode("UTF-8", "strict"), ctypes.byref(mem)
+        mem = self._outPtr
+        mem.value = None
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._HtnFindAllPlans(
+            self.obj, _encodeQuery(value), self._outRef
         )
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info("FindAllPlans %s ms: %s", str(elapsedTimeNS / 1000000), value)
+        if perfEnabled:
+            perfLogger.info(
+                "FindAllPlans %.3f ms: %s",
+                (perf_counter_ns() - startTime) / 1e6,
+                value,
+            )
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode(), None
+        if resultPtr:
+            return self._takeString(resultPtr).decode(), None
         else:
-            resultQuery = ctypes.c_char_p.from_buffer(mem).value.decode()
-            self.indhtnLib.FreeString(mem)
-            return None, resultQuery
+            return None, self._takeString(mem)
 
     def FindAllPlansCustomVariables(self, value):
+        error, resultBytes = self.FindAllPlansCustomVariablesRaw(value)
+        if error is not None:
+            return error, None
+        return None, resultBytes.decode()
+
+    # Same as FindAllPlansCustomVariables() but solutions is the utf-8 json as bytes, see PrologQueryRaw()
+    def FindAllPlansCustomVariablesRaw(self, value):
+        self.ClearQueryCache()
         # Pointer to pointer conversion: https://stackoverflow.com/questions/4213095/python-and-ctypes-how-to-correctly-pass-pointer-to-pointer-into-dll
-        mem = ctypes.POINTER(ctypes.c_char)()
-
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.HtnFindAllPlansCustomVariables(
-            self.obj, value.encode("UTF-8", "strict"), ctypes.byref(mem)
+        mem = self._outPtr
+        mem.value = None
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._HtnFindAllPlansCustomVariables(
+            self.obj, _encodeQuery(value), self._outRef
         )
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info("FindAllPlans %s ms: %s", str(elapsedTimeNS / 1000000), value)
+        if perfEnabled:
+            perfLogger.info(
+                "FindAllPlans %.3f ms: %s",
+                (perf_counter_ns() - startTime) / 1e6,
+                value,
+            )
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode(), None
+        if resultPtr:
+            return self._takeString(resultPtr).decode(), None
         else:
-            resultQuery = ctypes.c_char_p.from_buffer(mem).value.decode()
-            self.indhtnLib.FreeString(mem)
-            return None, resultQuery
+            return None, self._takeString(mem)
 
     # returns compileError, solutions
     # compileError = None if no compile error, or a string error message OR a string that starts with "out of memory:"
@@ -505,43 +773,131 @@ class HtnPlanner(object):
     #   - If there were solutions it will be a list containing all the solutions
     #       each is a dictionary where the keys are variable names and the values are what they are assigned to
     def PrologQuery(self, value):
-        mem = ctypes.POINTER(ctypes.c_char)()
-
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.PrologQuery(
-            self.obj, value.encode("UTF-8", "strict"), ctypes.byref(mem)
+        queryCache = self._queryCache
+        if queryCache is not None:
+            result = queryCache.get(value)
+            if result is not None:
+                return result
+
+        error, resultBytes = self._prologQueryBytes(value)
+        if error is not None:
+            result = error, None
+        else:
+            result = None, resultBytes.decode()
+
+        if queryCache is not None:
+            queryCache[value] = result
+        return result
+
+    # Same as PrologQuery() but solutions is the utf-8 json as bytes. json.loads(), orjson
+    # and queryResultToPrologStringList() accept bytes, and so do most ways of sending
+    # it on (files, sockets, HTTP responses), so callers that only parse or forward
+    # the result can skip decoding it to a str first. Not cached by SetQueryCaching(), and
+    # since the query may assert or retract facts it clears the PrologQuery() cache
+    def PrologQueryRaw(self, value):
+        self.ClearQueryCache()
+        return self._prologQueryBytes(value)
+
+    # PrologQuery() and PrologQueryRaw() without touching the query cache
+    def _prologQueryBytes(self, value):
+        mem = self._outPtr
+        mem.value = None
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._PrologQuery(
+            self.obj, _encodeQuery(value), self._outRef
         )
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info("PrologQuery %s ms: %s", str(elapsedTimeNS / 1000000), value)
+        if perfEnabled:
+            perfLogger.info(
+                "PrologQuery %.3f ms: %s",
+                (perf_counter_ns() - startTime) / 1e6,
+                value,
+            )
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode(), None
+        if resultPtr:
+            return self._takeString(resultPtr).decode(), None
         else:
-            resultQuery = ctypes.c_char_p.from_buffer(mem).value.decode()
-            self.indhtnLib.FreeString(mem)
-            return None, resultQuery
+            return None, self._takeString(mem)
+
+    # Runs every query in queries exactly like PrologQuery() but with a single call into the library,
+    # which is much cheaper than calling PrologQuery() in a loop when there are many small queries
+    # returns a list with one (compileError, solutions) tuple per query, in the same order as queries
+    def PrologQueryBatch(self, queries):
+        if len(queries) == 0:
+            return []
+
+        self.ClearQueryCache()
+
+        # Each query is packed as a 4 byte little endian length followed by its bytes,
+        # all with a single struct.pack so the library can slice them without scanning
+        encodedQueries = [_encodeQuery(query) for query in queries]
+        packedQueries = struct.pack(
+            "<" + "".join([f"I{len(query)}s" for query in encodedQueries]),
+            *[item for query in encodedQueries for item in (len(query), query)],
+        )
+        mem = self._outPtr
+        mem.value = None
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._PrologQueryBatch(
+            self.obj,
+            packedQueries,
+            len(encodedQueries),
+            self._outRef,
+        )
+        if perfEnabled:
+            perfLogger.info(
+                "PrologQueryBatch %.3f ms: %d queries",
+                (perf_counter_ns() - startTime) / 1e6,
+                len(encodedQueries),
+            )
+
+        if resultPtr:
+            error = self._takeString(resultPtr).decode()
+            return [(error, None)] * len(encodedQueries)
+
+        # Each entry is <kind><length>:<payload>, kind is b"r" for a result and b"e" for an error
+        packed = self._takeString(mem)
+        results = []
+        offset = 0
+        for _ in range(len(encodedQueries)):
+            separator = packed.index(b":", offset)
+            end = separator + 1 + int(packed[offset + 1 : separator])
+            payload = packed[separator + 1 : end].decode()
+            if packed[offset : offset + 1] == b"r":
+                results.append((None, payload))
+            else:
+                results.append((payload, None))
+            offset = end
+
+        return results
 
     # You SHOULD NOT USE THIS
     # This is intended to test the ability of the Prolog compiler to separate goals() from the other rules
     # and solve them. This requires to use PrologCompile()
     def PrologSolveGoals(self):
-        mem = ctypes.POINTER(ctypes.c_char)()
-
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.PrologSolveGoals(self.obj, ctypes.byref(mem))
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info("PrologSolveGoals %s ms", str(elapsedTimeNS / 1000000))
+        self.ClearQueryCache()
+        mem = self._outPtr
+        mem.value = None
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._PrologSolveGoals(self.obj, self._outRef)
+        if perfEnabled:
+            perfLogger.info(
+                "PrologSolveGoals %.3f ms",
+                (perf_counter_ns() - startTime) / 1e6,
+            )
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode(), None
+        if resultPtr:
+            return self._takeString(resultPtr).decode(), None
         else:
-            resultQuery = ctypes.c_char_p.from_buffer(mem).value.decode()
-            self.indhtnLib.FreeString(mem)
-            return None, resultQuery
+            return None, self._takeString(mem).decode()
 
     # returns compileError, json
     # compileError = None if no compile error, or a string error message OR a string that starts with "out of memory:"
@@ -555,25 +911,27 @@ class HtnPlanner(object):
         if value.strip() == "":
             return None, ""
 
-        mem = ctypes.POINTER(ctypes.c_char)()
+        self.ClearQueryCache()
+        mem = self._outPtr
+        mem.value = None
 
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.PrologQueryToJson(
-            self.obj, value.encode("UTF-8", "strict"), ctypes.byref(mem)
-        )
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info(
-            "PrologQueryToJson %s ms: %s", str(elapsedTimeNS / 1000000), value
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._PrologQueryToJson(
+            self.obj, _encodeQuery(value), self._outRef
         )
+        if perfEnabled:
+            perfLogger.info(
+                "PrologQueryToJson %.3f ms: %s",
+                (perf_counter_ns() - startTime) / 1e6,
+                value,
+            )
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode(), None
+        if resultPtr:
+            return self._takeString(resultPtr).decode(), None
         else:
-            resultQuery = ctypes.c_char_p.from_buffer(mem).value.decode()
-            self.indhtnLib.FreeString(mem)
-            return None, resultQuery
+            return None, self._takeString(mem).decode()
 
     # Returns error, treeJson
     # error = None if successful, or a string error message
@@ -592,83 +950,111 @@ class HtnPlanner(object):
     #   - failureReason: why it failed (if applicable)
     # Must call FindAllPlans or FindAllPlansCustomVariables first
     def GetDecompositionTree(self, solutionIndex=0):
-        mem = ctypes.POINTER(ctypes.c_char)()
-
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.HtnGetDecompositionTree(
-            self.obj, solutionIndex, ctypes.byref(mem)
-        )
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info(
-            "GetDecompositionTree %s ms: solution %d",
-            str(elapsedTimeNS / 1000000),
-            solutionIndex,
+        mem = self._outPtr
+        mem.value = None
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._HtnGetDecompositionTree(
+            self.obj, solutionIndex, self._outRef
         )
+        if perfEnabled:
+            perfLogger.info(
+                "GetDecompositionTree %.3f ms: solution %d",
+                (perf_counter_ns() - startTime) / 1e6,
+                solutionIndex,
+            )
 
         # C++ returns: error string (or nullptr on success), *result = tree JSON (or nullptr on error)
         # So resultPtr contains error message if not null, mem contains tree JSON on success
         # Return format: (error, tree_json) to match other API functions
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
+        if resultPtr:
             # Error case: resultPtr is error string
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode(), None  # Return (error_message, None)
+            return self._takeString(resultPtr).decode(), None  # Return (error_message, None)
         else:
             # Success case: mem contains tree JSON
-            resultQuery = ctypes.c_char_p.from_buffer(mem).value.decode()
-            self.indhtnLib.FreeString(mem)
-            return None, resultQuery  # Return (None, tree_json)
+            return None, self._takeString(mem).decode()  # Return (None, tree_json)
 
     # Returns the number of resolution steps from the last Prolog query
     # Returns -1 if resolution step tracking was disabled at compile time
     # (enabled by default, disable with -DINDHTN_TRACK_RESOLUTION_STEPS=OFF)
     def GetLastResolutionStepCount(self):
-        return self.indhtnLib.GetLastResolutionStepCount(self.obj)
+        return self._GetLastResolutionStepCount(self.obj)
 
     # Returns error, factsJson
     # error = None if successful, or a string error message
     # factsJson = JSON array of fact strings representing the current state
     #   e.g., ["tile(0,0)", "tile(1,0)", "at(player, home)"]
     def GetStateFacts(self):
-        mem = ctypes.POINTER(ctypes.c_char)()
-
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.HtnGetStateFacts(
-            self.obj, ctypes.byref(mem)
+        mem = self._outPtr
+        mem.value = None
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._HtnGetStateFacts(
+            self.obj, self._outRef
         )
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info("GetStateFacts %s ms", str(elapsedTimeNS / 1000000))
+        if perfEnabled:
+            perfLogger.info(
+                "GetStateFacts %.3f ms",
+                (perf_counter_ns() - startTime) / 1e6,
+            )
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode(), None
+        if resultPtr:
+            return self._takeString(resultPtr).decode(), None
         else:
-            resultQuery = ctypes.c_char_p.from_buffer(mem).value.decode()
-            self.indhtnLib.FreeString(mem)
-            return None, resultQuery
+            return None, self._takeString(mem).decode()
+
+    # Same as GetStateFacts() but facts is a list of fact strings. The library hands back
+    # the strings directly so there is no json to build or parse
+    def GetStateFactsList(self):
+        factArray = ctypes.POINTER(ctypes.c_char_p)()
+        count = ctypes.c_uint64()
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._HtnGetStateFactsArray(
+            self.obj, _byref(factArray), _byref(count)
+        )
+        if perfEnabled:
+            perfLogger.info(
+                "GetStateFactsList %.3f ms",
+                (perf_counter_ns() - startTime) / 1e6,
+            )
+
+        return self._factArrayResult(resultPtr, factArray, count.value)
+
+    # Returns (error, facts) for the strings returned by one of the *FactsArray functions
+    # and frees them
+    def _factArrayResult(self, resultPtr, factArray, count):
+        if resultPtr:
+            return self._takeString(resultPtr).decode(), None
+
+        facts = [fact.decode() for fact in factArray[:count]]
+        self._FreeStringArray(factArray, count)
+        return None, facts
 
     # Returns (error, goals) where goals is a list of Prolog-ish goal strings
     # from the goals() directives compiled via HtnCompileCustomVariables.
     # error = None on success; goals = [] if no goals() directives have been compiled.
     def GetGoals(self, customVariables=True):
         import json
-        mem = ctypes.POINTER(ctypes.c_char)()
+        mem = self._outPtr
+        mem.value = None
 
-        fn = (self.indhtnLib.HtnGetGoalsCustomVariables
+        fn = (self._HtnGetGoalsCustomVariables
               if customVariables
-              else self.indhtnLib.HtnGetGoals)
-        resultPtr = fn(self.obj, ctypes.byref(mem))
+              else self._HtnGetGoals)
+        resultPtr = fn(self.obj, self._outRef)
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode(), None
+        if resultPtr:
+            return self._takeString(resultPtr).decode(), None
         else:
-            goalsJson = ctypes.c_char_p.from_buffer(mem).value.decode()
-            self.indhtnLib.FreeString(mem)
             try:
-                return None, json.loads(goalsJson)
+                return None, self._jsonLoadsAndFree(mem)
             except json.JSONDecodeError as e:
                 return f"Failed to parse goals JSON: {e}", None
 
@@ -678,27 +1064,47 @@ class HtnPlanner(object):
     #   e.g., ["tile(0,0)", "tile(1,0)", "at(player, park)"]
     # Must call FindAllPlans or FindAllPlansCustomVariables first
     def GetSolutionFacts(self, solutionIndex=0):
-        mem = ctypes.POINTER(ctypes.c_char)()
-
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.HtnGetSolutionFacts(
-            self.obj, solutionIndex, ctypes.byref(mem)
-        )
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info(
-            "GetSolutionFacts %s ms: solution %d",
-            str(elapsedTimeNS / 1000000),
-            solutionIndex,
+        mem = self._outPtr
+        mem.value = None
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._HtnGetSolutionFacts(
+            self.obj, solutionIndex, self._outRef
         )
+        if perfEnabled:
+            perfLogger.info(
+                "GetSolutionFacts %.3f ms: solution %d",
+                (perf_counter_ns() - startTime) / 1e6,
+                solutionIndex,
+            )
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode(), None
+        if resultPtr:
+            return self._takeString(resultPtr).decode(), None
         else:
-            resultQuery = ctypes.c_char_p.from_buffer(mem).value.decode()
-            self.indhtnLib.FreeString(mem)
-            return None, resultQuery
+            return None, self._takeString(mem).decode()
+
+    # Same as GetSolutionFacts() but facts is a list of fact strings instead of json
+    # Must call FindAllPlans or FindAllPlansCustomVariables first
+    def GetSolutionFactsList(self, solutionIndex=0):
+        factArray = ctypes.POINTER(ctypes.c_char_p)()
+        count = ctypes.c_uint64()
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._HtnGetSolutionFactsArray(
+            self.obj, solutionIndex, _byref(factArray), _byref(count)
+        )
+        if perfEnabled:
+            perfLogger.info(
+                "GetSolutionFactsList %.3f ms: solution %d",
+                (perf_counter_ns() - startTime) / 1e6,
+                solutionIndex,
+            )
+
+        return self._factArrayResult(resultPtr, factArray, count.value)
 
     # Returns error, parallelizedPlanJson
     # error = None if successful, or a string error message
@@ -718,27 +1124,26 @@ class HtnPlanner(object):
     # get the same timestep and can be executed concurrently.
     # Must call FindAllPlans or FindAllPlansCustomVariables first
     def GetParallelizedPlan(self, solutionIndex=0):
-        mem = ctypes.POINTER(ctypes.c_char)()
-
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.HtnGetParallelizedPlan(
-            self.obj, solutionIndex, ctypes.byref(mem)
-        )
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info(
-            "GetParallelizedPlan %s ms: solution %d",
-            str(elapsedTimeNS / 1000000),
-            solutionIndex,
+        mem = self._outPtr
+        mem.value = None
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._HtnGetParallelizedPlan(
+            self.obj, solutionIndex, self._outRef
         )
+        if perfEnabled:
+            perfLogger.info(
+                "GetParallelizedPlan %.3f ms: solution %d",
+                (perf_counter_ns() - startTime) / 1e6,
+                solutionIndex,
+            )
 
-        resultBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if resultBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            return resultBytes.decode(), None
+        if resultPtr:
+            return self._takeString(resultPtr).decode(), None
         else:
-            resultQuery = ctypes.c_char_p.from_buffer(mem).value.decode()
-            self.indhtnLib.FreeString(mem)
-            return None, resultQuery
+            return None, self._takeString(mem).decode()
 
     # Returns a list of choice-point records captured during the last planning call.
     # Raises RuntimeError if INDHTN_CHOICE_TRACKING was not compiled in (the default build
@@ -746,21 +1151,23 @@ class HtnPlanner(object):
     # When the feature is compiled in, returns a Python list parsed from the JSON the C++
     # side produced.
     def GetChoiceData(self):
-        mem = ctypes.POINTER(ctypes.c_char)()
-
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.HtnGetChoiceData(self.obj, ctypes.byref(mem))
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info("GetChoiceData %s ms", str(elapsedTimeNS / 1000000))
+        mem = self._outPtr
+        mem.value = None
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._HtnGetChoiceData(self.obj, self._outRef)
+        if perfEnabled:
+            perfLogger.info(
+                "GetChoiceData %.3f ms",
+                (perf_counter_ns() - startTime) / 1e6,
+            )
 
-        errorBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if errorBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            raise RuntimeError(errorBytes.decode("utf-8", "replace"))
+        if resultPtr:
+            raise RuntimeError(self._takeString(resultPtr).decode("utf-8", "replace"))
 
-        raw = ctypes.c_char_p.from_buffer(mem).value
-        self.indhtnLib.FreeString(mem)
-        return json.loads(raw.decode("utf-8"))
+        return self._jsonLoadsAndFree(mem)
 
     def GetChoiceStats(self):
         """Return cross-search choice-count stats {"byAtom": [...], "byMethod": [...]}.
@@ -768,24 +1175,42 @@ class HtnPlanner(object):
         Raises RuntimeError if the feature was not compiled in
         (build with -DINDHTN_CHOICE_TRACKING=ON).
         """
-        mem = ctypes.POINTER(ctypes.c_char)()
+        mem = self._outPtr
+        mem.value = None
+
+        perfEnabled = perfLogger.isEnabledFor(logging.INFO)
+        if perfEnabled:
+            startTime = perf_counter_ns()
+        resultPtr = self._HtnGetChoiceStats(self.obj, self._outRef)
+        if perfEnabled:
+            perfLogger.info(
+                "GetChoiceStats %.3f ms",
+                (perf_counter_ns() - startTime) / 1e6,
+            )
 
-        startTime = perf_counter_ns()
-        resultPtr = self.indhtnLib.HtnGetChoiceStats(self.obj, ctypes.byref(mem))
-        elapsedTimeNS = perf_counter_ns() - startTime
-        perfLogger.info("GetChoiceStats %s ms", str(elapsedTimeNS / 1000000))
+        if resultPtr:
+            raise RuntimeError(self._takeString(resultPtr).decode("utf-8", "replace"))
 
-        errorBytes = ctypes.c_char_p.from_buffer(resultPtr).value
-        if errorBytes is not None:
-            self.indhtnLib.FreeString(resultPtr)
-            raise RuntimeError(errorBytes.decode("utf-8", "replace"))
+        return self._jsonLoadsAndFree(mem)
 
-        raw = ctypes.c_char_p.from_buffer(mem).value
-        self.indhtnLib.FreeString(mem)
-        return json.loads(raw.decode("utf-8"))
+    # Returns a copy of the string the library returned at ptr as bytes, and frees it
+    def _takeString(self, ptr):
+        resultBytes = _string_at(ptr)
+        self._FreeString(ptr)
+        return resultBytes
 
-    def __del__(self):
-        self.indhtnLib.DeleteHtnPlanner(self.obj)
+    # Parses the json string in mem and frees it. With orjson the library's buffer is
+    # parsed in place, which skips copying large results into a bytes object first
+    def _jsonLoadsAndFree(self, mem):
+        try:
+            if _jsonLoadsBuffers:
+                length = self._StringLength(mem)
+                return _json_loads(
+                    memoryview((ctypes.c_char * length).from_address(mem.value))
+                )
+            return _json_loads(_string_at(mem))
+        finally:
+            self._FreeString(mem)
 
 
 @contextmanager
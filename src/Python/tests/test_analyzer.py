@@ -29,6 +29,17 @@ class AnalyzerTestSuite:
         self.errors = []
         self.examples_dir = os.path.join(project_root, 'Examples')
         self.error_tests_dir = os.path.join(project_root, 'Examples', 'ErrorTests')
+        # analyze_file() results by path, so a file used by several tests is only analyzed once
+        self._file_results = {}
+
+    def analyze_file(self, file_path: str) -> dict:
+        """Analyze an HTN file, reusing the result if this suite already analyzed it.
+        Results are shared between tests, so treat them as read-only"""
+        result = self._file_results.get(file_path)
+        if result is None:
+            result = analyze_file(file_path)
+            self._file_results[file_path] = result
+        return result
 
     def assert_true(self, condition: bool, test_name: str, msg: str = ""):
         """Assert a condition is true"""
@@ -109,7 +120,7 @@ def run_basic_analysis_tests(suite: AnalyzerTestSuite):
     print("\n--- Basic Analysis Tests ---")
 
     # Test Taxi.htn analysis
-    result = analyze_file(os.path.join(suite.examples_dir, 'Taxi.htn'))
+    result = suite.analyze_file(os.path.join(suite.examples_dir, 'Taxi.htn'))
     suite.assert_has_nodes(result, test_name="Taxi.htn has nodes")
     suite.assert_true(
         result.get('stats', {}).get('methods', 0) > 0,
@@ -125,7 +136,7 @@ def run_basic_analysis_tests(suite: AnalyzerTestSuite):
     )
 
     # Test Game.htn analysis
-    result = analyze_file(os.path.join(suite.examples_dir, 'Game.htn'))
+    result = suite.analyze_file(os.path.join(suite.examples_dir, 'Game.htn'))
     suite.assert_has_nodes(result, test_name="Game.htn has nodes")
     suite.assert_true(
         result.get('stats', {}).get('methods', 0) > 5,
@@ -138,15 +149,15 @@ def run_cycle_detection_tests(suite: AnalyzerTestSuite):
     print("\n--- Cycle Detection Tests ---")
 
     # Direct cycle
-    result = analyze_file(os.path.join(suite.error_tests_dir, 'semantic_cycle_direct.htn'))
+    result = suite.analyze_file(os.path.join(suite.error_tests_dir, 'semantic_cycle_direct.htn'))
     suite.assert_detects_cycle(result, test_name="Detects direct cycle")
 
     # Indirect cycle
-    result = analyze_file(os.path.join(suite.error_tests_dir, 'semantic_cycle_indirect.htn'))
+    result = suite.analyze_file(os.path.join(suite.error_tests_dir, 'semantic_cycle_indirect.htn'))
     suite.assert_detects_cycle(result, test_name="Detects indirect cycle")
 
     # No cycle in Taxi.htn
-    result = analyze_file(os.path.join(suite.examples_dir, 'Taxi.htn'))
+    result = suite.analyze_file(os.path.join(suite.examples_dir, 'Taxi.htn'))
     suite.assert_no_cycles(result, test_name="Taxi.htn has no cycles")
 
 
@@ -155,11 +166,11 @@ def run_dead_code_tests(suite: AnalyzerTestSuite):
     print("\n--- Dead Code Detection Tests ---")
 
     # Dead operator
-    result = analyze_file(os.path.join(suite.error_tests_dir, 'semantic_dead_operator.htn'))
+    result = suite.analyze_file(os.path.join(suite.error_tests_dir, 'semantic_dead_operator.htn'))
     suite.assert_has_unreachable(result, test_name="Detects dead operator")
 
     # Dead method
-    result = analyze_file(os.path.join(suite.error_tests_dir, 'semantic_dead_method.htn'))
+    result = suite.analyze_file(os.path.join(suite.error_tests_dir, 'semantic_dead_method.htn'))
     suite.assert_has_unreachable(result, test_name="Detects dead method")
 
 
@@ -197,6 +197,26 @@ class TestEnhancedNode(unittest.TestCase):
         self.assertEqual(len(result['children']), 1)
         self.assertEqual(result['children'][0]['name'], 'walk')
 
+    def test_to_dict_deep_tree(self):
+        """Test that deep trees convert without recursing and keep child order"""
+        def make_node(name, children):
+            return EnhancedNode(
+                id=name, name=name, full_signature=name, task_name=name,
+                is_operator=not children, status='success', bindings={},
+                condition_bindings={}, condition_terms=[], children=children
+            )
+
+        node = make_node('leaf', [])
+        for depth in range(5000):
+            node = make_node(f'n{depth}', [node, make_node(f'op{depth}', [])])
+
+        result = node.to_dict()
+
+        self.assertEqual([c['name'] for c in result['children']], ['n4998', 'op4999'])
+        for _ in range(5000):
+            result = result['children'][0]
+        self.assertEqual(result['name'], 'leaf')
+
 
 class TestCategorizeFailureReason(unittest.TestCase):
     """Tests for the categorize_failure_reason function"""
@@ -235,6 +255,11 @@ class TestCategorizeFailureReason(unittest.TestCase):
         self.assertEqual(categorize_failure_reason(""), 'UNKNOWN')
         self.assertEqual(categorize_failure_reason(None), 'UNKNOWN')
 
+    def test_earlier_category_wins(self):
+        """Test that a reason with keywords of several categories gets the first one checked"""
+        self.assertEqual(categorize_failure_reason("child condition failed"), 'PRECONDITION_FAILED')
+        self.assertEqual(categorize_failure_reason("operator backtracked, no method"), 'NO_MATCHING_METHOD')
+
 
 class TestFailureAnalyzer(unittest.TestCase):
     """Tests for FailureAnalyzer class"""
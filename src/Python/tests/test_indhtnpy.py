@@ -0,0 +1,164 @@
+"""
+Tests for the indhtnpy ctypes wrapper itself (HtnPlanner methods and the
+Prolog json term helpers), as opposed to the rulesets it runs.
+"""
+
+import json
+
+import pytest
+from indhtnpy import (
+    findAllPlansJsonToPrologStringList,
+    resultIsFailure,
+    termListToString,
+    termToString,
+)
+
+
+@pytest.fixture
+def prolog_planner(htn_planner):
+    """HtnPlanner with a few Prolog facts compiled in."""
+    error = htn_planner.PrologCompile("letter(a). letter(b). capital(a).")
+    assert error is None
+    return htn_planner
+
+
+class TestPrologQueryBatch:
+    """PrologQueryBatch() must behave exactly like PrologQuery() in a loop."""
+
+    def test_matches_prolog_query(self, prolog_planner):
+        queries = ["letter(X).", "capital(Y).", "letter(c).", "letter("]
+        expected = [prolog_planner.PrologQuery(query) for query in queries]
+        assert prolog_planner.PrologQueryBatch(queries) == expected
+
+    def test_compile_error_is_per_query(self, prolog_planner):
+        results = prolog_planner.PrologQueryBatch(["letter(", "letter(a)."])
+        assert results[0][0] is not None and results[0][1] is None
+        assert results[1] == (None, "[{}]")
+
+    def test_empty(self, prolog_planner):
+        assert prolog_planner.PrologQueryBatch([]) == []
+
+
+class TestRaw:
+    """The *Raw() methods return the same results as bytes."""
+
+    def test_prolog_query_raw(self, prolog_planner):
+        error, result = prolog_planner.PrologQuery("letter(X).")
+        assert prolog_planner.PrologQueryRaw("letter(X).") == (error, result.encode())
+
+    def test_find_all_plans_raw(self, htn_planner):
+        assert htn_planner.HtnCompileCustomVariables(
+            "at(home). travel() :- del(at(home)), add(at(park))."
+        ) is None
+        # travel() retracts at(home), so it can only be planned once per compile
+        error, resultBytes = htn_planner.FindAllPlansCustomVariablesRaw("travel().")
+        assert error is None
+        assert type(resultBytes) is bytes
+        assert json.loads(resultBytes) == [[{"travel": []}]]
+
+
+class TestQueryCaching:
+    """SetQueryCaching(True) must not change what PrologQuery() returns."""
+
+    def test_repeated_query_uses_cache(self, prolog_planner):
+        prolog_planner.SetQueryCaching(True)
+        first = prolog_planner.PrologQuery("letter(X).")
+        assert prolog_planner.PrologQuery("letter(X).") is first
+
+    def test_compile_clears_cache(self, prolog_planner):
+        prolog_planner.SetQueryCaching(True)
+        before = prolog_planner.PrologQuery("letter(X).")
+        assert prolog_planner.PrologCompile("letter(c).") is None
+        assert prolog_planner.PrologQuery("letter(X).") is not before
+
+    def test_planning_clears_cache(self, htn_planner):
+        assert htn_planner.HtnCompileCustomVariables(
+            "at(home). travel() :- del(at(home)), add(at(park))."
+        ) is None
+        htn_planner.SetQueryCaching(True)
+        error, before = htn_planner.PrologQuery("at(?X).")
+        assert error is None and "home" in before
+        error, _ = htn_planner.FindAllPlansCustomVariables("travel().")
+        assert error is None
+        error, after = htn_planner.PrologQuery("at(?X).")
+        assert error is None and "park" in after and "home" not in after
+
+    def test_raw_query_clears_cache(self, prolog_planner):
+        prolog_planner.SetQueryCaching(True)
+        before = prolog_planner.PrologQuery("letter(X).")
+        prolog_planner.PrologQueryRaw("assert(letter(c)).")
+        assert prolog_planner.PrologQuery("letter(X).") is not before
+
+    def test_off_by_default(self, prolog_planner):
+        first = prolog_planner.PrologQuery("letter(X).")
+        assert prolog_planner.PrologQuery("letter(X).") is not first
+
+
+class TestFactsList:
+    """Get*FactsList() must return what json parsing Get*Facts() returns."""
+
+    def test_state_facts(self, prolog_planner):
+        error, factsJson = prolog_planner.GetStateFacts()
+        assert error is None
+        assert prolog_planner.GetStateFactsList() == (None, json.loads(factsJson))
+
+    def test_solution_facts(self, htn_planner):
+        assert htn_planner.HtnCompileCustomVariables(
+            "at(home). travel() :- del(at(home)), add(at(park))."
+        ) is None
+        error, _ = htn_planner.FindAllPlansCustomVariables("travel().")
+        assert error is None
+        error, factsJson = htn_planner.GetSolutionFacts(0)
+        assert error is None
+        assert htn_planner.GetSolutionFactsList(0) == (None, json.loads(factsJson))
+
+    def test_bad_solution_index(self, htn_planner):
+        error, facts = htn_planner.GetSolutionFactsList(5)
+        assert error is not None and facts is None
+
+
+class TestTermToString:
+    """termToString()/termListToString() formatting of Prolog json terms."""
+
+    def test_compound_and_list(self):
+        term = {"f": [{"a": []}, [{"b": []}, "?X"], {"g": [{"c": []}]}]}
+        assert termToString(term) == "f(a, [b, ?X], g(c))"
+
+    def test_empty_list_and_constant(self):
+        assert termToString([]) == "[]"
+        assert termToString({"a": []}) == "a"
+
+    def test_term_list(self):
+        assert termListToString([{"a": []}, {"f": [{"b": []}]}]) == "a, f(b)"
+
+    def test_deep_term_does_not_recurse(self):
+        term = {"leaf": []}
+        for _ in range(5000):
+            term = {"s": [term]}
+        assert termToString(term) == "s(" * 5000 + "leaf" + ")" * 5000
+
+
+class TestResultIsFailure:
+    """resultIsFailure() must agree with parsing the result and checking for false."""
+
+    def test_failure(self):
+        result = '[{"false" :[]}, {"failureIndex" :[{"-1" :[]}]}]'
+        assert resultIsFailure(result)
+        assert resultIsFailure(result.encode())
+
+    def test_solutions(self):
+        assert not resultIsFailure('[{"X" :[{"a" :[]}]}]')
+        assert not resultIsFailure(b'[[{"walk" :[]}]]')
+        assert not resultIsFailure("[{}]")
+
+
+class TestFindAllPlansJsonToPrologStringList:
+    """Formatting of parsed FindAllPlans() results."""
+
+    def test_plans(self):
+        solutions = [[{"walk": [{"a": []}]}, {"ride": []}], []]
+        assert findAllPlansJsonToPrologStringList(solutions) == ["walk(a), ride", ""]
+
+    def test_failure(self):
+        failure = [{"false": []}, {"failureIndex": [{"-1": []}]}]
+        assert findAllPlansJsonToPrologStringList(failure) == ["false, failureIndex(-1)"]